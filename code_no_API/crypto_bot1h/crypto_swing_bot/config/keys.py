@@ -15,4 +15,50 @@ USE_TESTNET = False          # MUST be False for Binance.US live API
 STARTING_CAPITAL = 40.0    # Your total account size in USDT for risk calculation
 TEST_TRADE_AMOUNT = 1.0      # Amount in USDT to use for initial test trades
 RISK_PER_TRADE = 0.015      # <-- ADD THIS LINE (1.5% risk per trade)
-MAX_POSITIONS = 1
\ No newline at end of file
+MAX_POSITIONS = 1
+
+# ===== SAFE MODE EXECUTION SIMULATOR =====
+SIM_LATENCY_MS = 250         # Delay between signal and simulated fill
+SIM_SLIPPAGE_BPS = 5.0       # Extra adverse slippage on market fills (basis points)
+SIM_FEE_RATE = 0.001         # Binance.US spot taker fee (0.1%)
+SIM_PATH_INTERVAL = "1m"     # Bar size used to check stop/TP triggers since entry
+
+# ===== LOGGING =====
+LOG_FILE = "trading_bot_1h.log"
+LOG_LEVEL = "INFO"
+LOG_MODULE_LEVELS = {        # Per-module overrides, e.g. "core.bot": "DEBUG" for per-symbol timings
+    "urllib3": "WARNING",
+}
+LOG_JSON = True              # JSON lines in the log file (console stays plain text)
+LOG_MAX_BYTES = 10_000_000   # Rotate when the file reaches ~10 MB
+LOG_ROTATE_HOURS = 24        # ...and at least once a day (0 disables)
+LOG_BACKUP_COUNT = 14        # Gzipped log files kept
+
+# ===== EXCHANGES =====
+# Supported: "binance_us", "binance_com", "csv", "parquet" (lake from download_history.py)
+TRADE_EXCHANGE = "binance_us"           # Venue for balances and fills (csv/parquet: STARTING_CAPITAL paper balance)
+DATA_EXCHANGES = ["binance_us"]         # Market data venues; each pair sticks to one, the rest are fallback
+CSV_DATA_DIR = "data/klines"            # {SYMBOL}_{interval}.csv files for the csv adapter
+LAKE_DIR = "data/lake"                  # Parquet lake for the parquet adapter (download_history.py --root)
+
+# ===== SIGNAL CACHE =====
+SIGNAL_CACHE_PATH = "data/signal_cache.json"  # Share between co-located bots to avoid double signals
+SIGNAL_CACHE_SIZE = 1000                      # Closed-bar analyses kept (LRU)
+
+# ===== SHARDED SCANNING =====
+SCAN_WORKERS = 0             # >0 splits pairs across this many worker processes
+SCAN_TIMEOUT = 300           # Seconds to wait for all workers each cycle
+
+# ===== TRADE REPORT =====
+TRADE_REPORT_INTERVAL = 60   # Min seconds between rebuilds of data/trade_history.xlsx
+
+# ===== LIVE TRADING =====
+LIVE_TRADING = False           # True places real market entries with exchange-side OCO exits (spot, LONG only)
+OCO_STOP_LIMIT_BUFFER = 0.002  # Stop-limit leg sits this far below the stop trigger
+
+# ===== PROFILING =====
+PROFILE_DIR = "data/profiles"    # Flight recorder dumps, cProfile stats and tracemalloc snapshots
+FLIGHT_RECORDER_CYCLES = 300     # Per-stage timings kept for the last N cycles
+FLIGHT_SLOW_CYCLE_SECONDS = 300  # Dump the recorder when a cycle takes longer (0 disables)
+PROFILE_CYCLES = 3               # Cycles captured per SIGUSR1 (kill -USR1 <pid>)
+PROFILE_CONTROL_PORT = 0         # >0 serves POST /profile?cycles=N and GET /flight on 127.0.0.1
@@ -4,6 +4,7 @@ Main trading bot
 import schedule
 import time
 import logging
+import threading
 from datetime import datetime
 from typing import Dict, Optional
 
@@ -11,21 +12,46 @@ from core.strategy import SwingStrategy
 from core.risk_manager import RiskManager
 from core.trade_logger import TradeLogger
 from core.telegram_notifier import TelegramNotifier
+from core.execution_simulator import ExecutionSimulator
+from core.logging_setup import setup_logging, event_fields
+from core.exchanges import create_exchange
+from core.signal_cache import SignalCache
+from core.scanner import ShardedScanner, scan_pairs
+from core.order_manager import OrderManager, UnprotectedPosition
+from core.profiler import FlightRecorder, CycleProfiler, ControlServer, install_signal_handler
 from config.keys import (
     BINANCE_API_KEY, BINANCE_API_SECRET,
     TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID,
     USE_TESTNET, STARTING_CAPITAL,
-    MAX_POSITIONS, RISK_PER_TRADE
+    MAX_POSITIONS, RISK_PER_TRADE,
+    SIM_LATENCY_MS, SIM_SLIPPAGE_BPS, SIM_FEE_RATE, SIM_PATH_INTERVAL,
+    LOG_FILE, LOG_LEVEL, LOG_MODULE_LEVELS, LOG_JSON,
+    LOG_MAX_BYTES, LOG_ROTATE_HOURS, LOG_BACKUP_COUNT,
+    TRADE_EXCHANGE, DATA_EXCHANGES, CSV_DATA_DIR, LAKE_DIR,
+    SIGNAL_CACHE_PATH, SIGNAL_CACHE_SIZE,
+    SCAN_WORKERS, SCAN_TIMEOUT,
+    TRADE_REPORT_INTERVAL,
+    LIVE_TRADING, OCO_STOP_LIMIT_BUFFER,
+    PROFILE_DIR, FLIGHT_RECORDER_CYCLES, FLIGHT_SLOW_CYCLE_SECONDS,
+    PROFILE_CYCLES, PROFILE_CONTROL_PORT
 )
 
-from binance.client import Client
-
 class SwingTradingBot:
     def __init__(self):
         # Setup logging
         self.setup_logging()
             
         self.last_api_time = time.time()
+        self.cycle_id = 0
+        
+        # Per-stage cycle timings, plus profiling armed at runtime
+        self.recorder = FlightRecorder(FLIGHT_RECORDER_CYCLES, PROFILE_DIR)
+        self.profiler = CycleProfiler(PROFILE_DIR)
+        install_signal_handler(self.profiler, PROFILE_CYCLES)
+        self.control_server = None
+        if PROFILE_CONTROL_PORT:
+            self.control_server = ControlServer(PROFILE_CONTROL_PORT, self.profiler, self.recorder, PROFILE_CYCLES)
+            self.control_server.start()
      
         # Initialize components
         self.strategy = SwingStrategy()
@@ -33,15 +59,48 @@ class SwingTradingBot:
         self.risk_manager.risk_per_trade = RISK_PER_TRADE
         self.risk_manager.max_positions = MAX_POSITIONS
         
-        self.trade_logger = TradeLogger()
+        self.trade_logger = TradeLogger(report_interval=TRADE_REPORT_INTERVAL)
         
-        # Connect to Binance.US
-        self.client = Client(
+        # One analysis per closed candle, shared across restarts
+        self.signal_cache = SignalCache(SIGNAL_CACHE_PATH, SIGNAL_CACHE_SIZE)
+        
+        # Paper fills against live order book and price path
+        self.simulator = ExecutionSimulator(
+            latency_ms=SIM_LATENCY_MS,
+            slippage_bps=SIM_SLIPPAGE_BPS,
+            fee_rate=SIM_FEE_RATE
+        )
+        
+        # Connect to the trading venue (Binance.US by default)
+        if LIVE_TRADING and not TRADE_EXCHANGE.startswith('binance'):
+            raise ValueError(f"LIVE_TRADING needs a Binance TRADE_EXCHANGE, not {TRADE_EXCHANGE}")
+        self.exchange = create_exchange(
+            TRADE_EXCHANGE,
             api_key=BINANCE_API_KEY,
             api_secret=BINANCE_API_SECRET,
-            tld='us'  # This is crucial for Binance.US
+            data_dir=CSV_DATA_DIR,
+            lake_dir=LAKE_DIR,
+            paper_balance=STARTING_CAPITAL
         )
         
+        # Market data venues - scanning pins each pair to one of them, the first also serves monitoring
+        self.data_sources = [
+            self.exchange if name == TRADE_EXCHANGE
+            else create_exchange(name, data_dir=CSV_DATA_DIR, lake_dir=LAKE_DIR)
+            for name in DATA_EXCHANGES
+        ] or [self.exchange]
+        self.market_data = self.data_sources[0]
+        
+        # Optionally split scanning across worker processes
+        self.scanner = None
+        if SCAN_WORKERS > 0:
+            self.scanner = ShardedScanner(
+                self.strategy.pairs, SCAN_WORKERS, DATA_EXCHANGES or [TRADE_EXCHANGE], CSV_DATA_DIR,
+                SIGNAL_CACHE_PATH, SIGNAL_CACHE_SIZE, timeout=SCAN_TIMEOUT,
+                log_level=LOG_LEVEL, module_levels=LOG_MODULE_LEVELS, lake_dir=LAKE_DIR
+            )
+            self.scanner.start()
+        
         # Setup Telegram
         if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
             self.telegram = TelegramNotifier(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
@@ -56,64 +115,156 @@ class SwingTradingBot:
             self.telegram = None
             self.logger.warning("Telegram notifications disabled")
         
-        # Track active trades
+        # Track active trades - exits can arrive from the user data stream thread
         self.active_trades = {}
+        self.trades_lock = threading.RLock()
         self.trade_count = 0
         self.is_running = True
         
+        # Live mode: the exchange enforces stops and targets via OCO brackets
+        self.order_manager = None
+        if LIVE_TRADING:
+            self.order_manager = OrderManager(self.exchange, self.exit_trade, OCO_STOP_LIMIT_BUFFER, on_alert=self.alert)
+            self.order_manager.start()
+            self.restore_live_trades()
+        
         self.logger.info(f"Bot initialized with ${STARTING_CAPITAL} capital")
     
     def setup_logging(self):
         """Configure logging"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('trading_bot_1h.log'),
-                logging.StreamHandler()
-            ]
+        self.log_listener = setup_logging(
+            log_file=LOG_FILE,
+            level=LOG_LEVEL,
+            module_levels=LOG_MODULE_LEVELS,
+            max_bytes=LOG_MAX_BYTES,
+            backup_count=LOG_BACKUP_COUNT,
+            rotate_hours=LOG_ROTATE_HOURS,
+            json_format=LOG_JSON
         )
         self.logger = logging.getLogger(__name__)
     
+    def log_context(self, stage: str, symbol: Optional[str] = None, started: Optional[float] = None) -> Dict:
+        """Structured fields for a log event"""
+        return event_fields(self.cycle_id, stage, symbol, started)
+    
     def check_account_balance(self):
         """Get current USDT balance"""
         try:
-            balance = self.client.get_asset_balance(asset='USDT')
-            available = float(balance['free'])
+            available = self.exchange.get_balance('USDT')
             self.logger.info(f"Available USDT: ${available:.2f}")
             return available
         except Exception as e:
             self.logger.error(f"Balance check failed: {e}")
             return 0
     
-    def scan_markets(self):
-        """Scan all markets for trading setups"""
-        signals = {}
+    def restore_live_trades(self):
+        """Rebuild active_trades from brackets still working on the exchange"""
+        try:
+            open_trades = self.trade_logger.get_open_trades()
+            # Paper trades left OPEN by SAFE MODE runs have nothing on the exchange
+            open_trades = open_trades[open_trades['Notes'].fillna('').astype(str).str.startswith('Live')]
+            if open_trades.empty:
+                return
+            
+            rows = {row.Trade_ID: row for row in open_trades.itertuples(index=False)}
+            entry_times = {trade_id: datetime.fromisoformat(row.Entry_Time) for trade_id, row in rows.items()}
+            states = self.order_manager.reconcile({
+                trade_id: (row.Symbol, int(entry_times[trade_id].timestamp() * 1000))
+                for trade_id, row in rows.items()
+            })
+        except Exception as e:
+            self.logger.error(f"Live trade reconciliation failed: {e}")
+            self.alert(f"🚨 Live trade reconciliation failed: {str(e)[:100]}")
+            return
         
-        for symbol in self.strategy.pairs:
+        for trade_id, state in states.items():
+            row = rows[trade_id]
             try:
-                # Fetch market data
-                df = self.strategy.fetch_klines(self.client, symbol)
+                if state['state'] not in ('OPEN', 'CLOSED'):
+                    detail = state.get('error', 'no bracket on the exchange')
+                    self.logger.error(f"Live trade {trade_id} not resumed ({detail}), check the {row.Symbol} position")
+                    self.alert(f"⚠️ Live trade {trade_id} has no exit bracket ({detail[:100]}). "
+                               f"Check the {row.Symbol} position manually.")
+                    continue
                 
-                # Analyze for signals
-                analysis = self.strategy.analyze(df)
+                with self.trades_lock:
+                    self.active_trades[row.Symbol] = {
+                        'trade_id': trade_id,
+                        'side': row.Side,
+                        'entry': row.Entry_Price,
+                        'entry_fee': 0.0,  # Not kept in the store
+                        'stop_loss': row.Stop_Loss,
+                        'take_profit': row.Take_Profit,
+                        'quantity': row.Quantity,
+                        'timestamp': entry_times[trade_id],
+                        'bracket_id': state.get('list_id')
+                    }
                 
-                if analysis['signal'] != 'HOLD':
-                    signals[symbol] = analysis
-                    self.logger.info(f"Signal found: {symbol} - {analysis['signal']}")
-                    
+                if state['state'] == 'OPEN':
+                    self.order_manager.track(state['list_id'], row.Symbol, trade_id, row.Quantity)
+                    self.logger.info(f"Resumed bracket for {row.Symbol} ({trade_id})")
+                else:
+                    # Filled while we were down; the fill's fee is unknown
+                    self.exit_trade(row.Symbol, state['reason'], state['price'])
+            
             except Exception as e:
-                self.logger.error(f"Error analyzing {symbol}: {e}")
+                self.logger.error(f"Failed to restore {trade_id}: {e}")
+                self.alert(f"⚠️ Failed to restore live trade {trade_id}: {str(e)[:100]}")
+    
+    def alert(self, text: str):
+        """Telegram message if notifications are enabled"""
+        if self.telegram:
+            with self.recorder.stage('notify'):
+                self.telegram.send_message(text)
+    
+    def scan_markets(self):
+        """Scan all markets for trading setups
+        
+        Returns {symbol: (cache_key, analysis)} for entry signals. They are only
+        cached once acted on, so a signal left over this cycle comes back next.
+        """
+        timings = {}
+        if self.scanner:
+            results = self.scanner.scan(self.cycle_id, timings)
+        else:
+            results = scan_pairs(self.strategy, self.data_sources, self.signal_cache,
+                                 self.strategy.pairs, self.cycle_id, timings)
+        for stage, seconds in timings.items():
+            self.recorder.add(stage, seconds)
+        
+        if not results:
+            self.logger.info("No new closed bars to analyze")
+            return {}
+        
+        # Coordinator is the only cache writer
+        timeframe = self.strategy.timeframe
+        param_hash = self.strategy.param_hash()
+        signals = {}
+        for symbol, (close_time, analysis) in results.items():
+            key = self.signal_cache.make_key(symbol, timeframe, close_time, param_hash)
+            if analysis['signal'] == 'HOLD':
+                self.signal_cache.put(key, analysis, save=False)
+            else:
+                signals[symbol] = (key, analysis)
+        with self.recorder.stage('log'):
+            self.signal_cache.save()
         
         return signals
     
-    def execute_trade(self, symbol: str, signal: Dict):
-        """Execute a trade (SAFE MODE - NO REAL TRADES)"""
+    def execute_trade(self, symbol: str, signal: Dict) -> bool:
+        """Execute a trade (paper fills unless LIVE_TRADING is on)
+        
+        Returns False only if the signal should be retried: nothing was sent
+        to the exchange and it wasn't deliberately skipped.
+        """
+        order_sent = False
         try:
+            decision_time = time.time()
+            
             # Check if already trading this symbol
             if symbol in self.active_trades:
                 self.logger.info(f"Already trading {symbol}")
-                return
+                return True
             
             # Calculate position
             entry = signal['entry']
@@ -123,13 +274,54 @@ class SwingTradingBot:
             quantity = self.risk_manager.calculate_position_size(entry, stop_loss)
             if quantity <= 0:
                 self.logger.warning(f"Invalid position size for {symbol}")
-                return
+                return True
             
-            # Calculate take profit
-            take_profit = self.risk_manager.calculate_take_profit(entry, stop_loss, side)
+            trade_id = None
+            bracket_id = None
+            unprotected = None
+            live = self.order_manager is not None
+            if live:
+                # A signal retried later in its bar may already be past its stop
+                if self.stop_breached(symbol, side, self.exchange.get_ticker(symbol), stop_loss):
+                    return True
+                
+                # Take profit is priced off the actual fill, like the paper path
+                trade_id = f"{symbol}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                order_sent = True  # A retry could double the position
+                try:
+                    with self.recorder.stage('execute'):
+                        placed = self.order_manager.open_bracket(trade_id, symbol, side, quantity, stop_loss,
+                                                                 self.risk_manager.min_risk_reward)
+                except UnprotectedPosition as e:
+                    # Record it like any live trade so it's visible and restored, but without a bracket
+                    unprotected = e.reason
+                    fill_price = e.entry_price or entry
+                    placed = {
+                        'entry_price': fill_price, 'quantity': e.quantity, 'fee': e.fee, 'list_id': None,
+                        'take_profit': self.risk_manager.calculate_take_profit(fill_price, stop_loss, side)
+                    }
+                if not placed:
+                    return True  # Skipped or flattened, see OrderManager log
+                entry, quantity, take_profit = placed['entry_price'], placed['quantity'], placed['take_profit']
+                fill = {'price': entry, 'fee': placed['fee'], 'source': 'exchange'}
+                bracket_id = placed['list_id']
+            else:
+                # Simulate the market fill instead of assuming the bar close
+                with self.recorder.stage('execute'):
+                    fill = self.simulator.fill_market_order(
+                        self.exchange, symbol, 'BUY' if side == 'LONG' else 'SELL',
+                        quantity, entry, decision_time=decision_time
+                    )
+                entry = fill['price']
+                if self.stop_breached(symbol, side, entry, stop_loss):
+                    return True
+                
+                # Calculate take profit
+                take_profit = self.risk_manager.calculate_take_profit(entry, stop_loss, side)
             
             # Prepare trade data
             trade_data = {
+                'trade_id': trade_id,
                 'symbol': symbol,
                 'side': side,
                 'entry_price': entry,
@@ -140,11 +332,13 @@ class SwingTradingBot:
                 'reason': signal.get('reason', ''),
                 'strategy': 'Swing_Trading',
                 'confidence': signal.get('confidence', 'MEDIUM'),
-                'notes': f"Paper Trade #{self.trade_count + 1}"
+                'notes': f"{'Live' if live else 'Paper'} Trade #{self.trade_count + 1}"
+                         f"{' UNPROTECTED' if unprotected else ''}"
             }
             
-            # Log to Excel (but don't actually trade)
-            trade_id = self.trade_logger.log_trade_entry(trade_data)
+            # Log to the trade store
+            with self.recorder.stage('log'):
+                trade_id = self.trade_logger.log_trade_entry(trade_data) or trade_id
             
             # Send Telegram alert
             if self.telegram:
@@ -161,26 +355,52 @@ class SwingTradingBot:
                     'confidence': signal.get('confidence', 'MEDIUM'),
                     'bot_frequency': '1H'  # 4-hour bot
                 }
-                self.telegram.send_trade_alert(alert_data)
+                with self.recorder.stage('notify'):
+                    self.telegram.send_trade_alert(alert_data)
             
-            # SIMULATE TRADE (NO REAL MONEY)
-            self.logger.info(f"[SAFE MODE] Would {side} {quantity} {symbol} at ${entry}")
-            self.active_trades[symbol] = {
-                'trade_id': trade_id,
-                'side': side,
-                'entry': entry,
-                'stop_loss': stop_loss,
-                'take_profit': take_profit,
-                'quantity': quantity,
-                'timestamp': datetime.now(),
-                'simulated': True
-            }
-            self.trade_count += 1
+            if not live:
+                self.logger.info(f"[SAFE MODE] Would {side} {quantity} {symbol} at ${entry} ({fill['source']})")
+            entry_time_ms = int(time.time() * 1000)
+            with self.trades_lock:
+                self.active_trades[symbol] = {
+                    'trade_id': trade_id,
+                    'side': side,
+                    'entry': entry,
+                    'entry_fee': fill['fee'],
+                    'stop_loss': stop_loss,
+                    'take_profit': take_profit,
+                    'quantity': quantity,
+                    'timestamp': datetime.now(),
+                    'entry_time_ms': entry_time_ms,
+                    'last_checked_ms': entry_time_ms,
+                    'bracket_id': bracket_id,
+                    'simulated': not live,
+                    'unprotected': bool(unprotected)
+                }
+                self.trade_count += 1
             
-            self.logger.info(f"Paper trade executed: {side} {quantity} {symbol}")
+            if unprotected:
+                self.logger.critical(f"Live {side} {quantity} {symbol} has no exit bracket: {unprotected}")
+                self.alert(f"🚨 {symbol} {side} position may be open WITHOUT stop-loss or take-profit "
+                           f"({unprotected[:100]}). Protect or close it manually.")
+            elif bracket_id is not None:
+                # Exit fills are delivered from here on, including any that already happened
+                self.order_manager.track(bracket_id, symbol, trade_id, quantity)
+                self.logger.info(f"Live trade executed: {side} {quantity} {symbol} at ${entry}")
+            else:
+                self.logger.info(f"Paper trade executed: {side} {quantity} {symbol}")
+            return True
             
         except Exception as e:
             self.logger.error(f"Trade execution failed: {e}")
+            return order_sent
+    
+    def stop_breached(self, symbol: str, side: str, price: float, stop_loss: float) -> bool:
+        """True if entering at price would already be through the stop"""
+        breached = price <= stop_loss if side == 'LONG' else price >= stop_loss
+        if breached:
+            self.logger.info(f"Skipping {side} {symbol}: price ${price} already past stop ${stop_loss}")
+        return breached
     
     def monitor_trades(self):
         """Monitor active trades for exit conditions"""
@@ -188,41 +408,46 @@ class SwingTradingBot:
             return
         
         for symbol, trade in list(self.active_trades.items()):
+            if trade.get('bracket_id') is not None or trade.get('unprotected'):
+                continue  # Exchange-side OCO handles the exit, or it's left to the user
+            started = time.perf_counter()
             try:
-                # Get current price
-                ticker = self.client.get_symbol_ticker(symbol=symbol)
-                current_price = float(ticker['price'])
-                exit_reason = None
+                # Check the high/low path printed since the last check
+                bars = self.strategy.fetch_klines(
+                    self.market_data, symbol, limit=1000,
+                    interval=SIM_PATH_INTERVAL,
+                    start_time=trade['last_checked_ms']
+                )
+                exit_info = self.simulator.check_exit(symbol, trade, bars)
                 
-                # Check stop loss
-                if trade['side'] == 'LONG' and current_price <= trade['stop_loss']:
-                    exit_reason = "STOP_LOSS"
-                elif trade['side'] == 'SHORT' and current_price >= trade['stop_loss']:
-                    exit_reason = "STOP_LOSS"
-                # Check take profit
-                elif trade['side'] == 'LONG' and current_price >= trade['take_profit']:
-                    exit_reason = "TAKE_PROFIT"
-                elif trade['side'] == 'SHORT' and current_price <= trade['take_profit']:
-                    exit_reason = "TAKE_PROFIT"
+                if exit_info:
+                    self.exit_trade(symbol, exit_info['exit_reason'],
+                                    exit_info['exit_price'], exit_info['exit_fee'])
+                elif not bars.empty:
+                    # Re-read the still-forming bar next time
+                    trade['last_checked_ms'] = int(bars['timestamp'].iloc[-1])
                 
-                if exit_reason:
-                    self.exit_trade(symbol, exit_reason, current_price)
+                self.logger.debug("Monitored %s: %d bars", symbol, len(bars),
+                                  extra=self.log_context('monitor', symbol, started))
                     
             except Exception as e:
-                self.logger.error(f"Error monitoring {symbol}: {e}")
+                self.logger.error("Error monitoring %s: %s", symbol, e,
+                                  extra=self.log_context('monitor', symbol, started))
     
-    def exit_trade(self, symbol: str, reason: str, exit_price: float):
+    def exit_trade(self, symbol: str, reason: str, exit_price: float, exit_fee: float = 0.0):
         """Exit a trade"""
         try:
-            trade = self.active_trades.pop(symbol, None)
+            with self.trades_lock:
+                trade = self.active_trades.pop(symbol, None)
             if not trade:
                 return
             
-            # Calculate P&L
+            # Calculate P&L net of simulated fees
+            fees = trade.get('entry_fee', 0.0) + exit_fee
             if trade['side'] == 'LONG':
-                pnl_usd = (exit_price - trade['entry']) * trade['quantity']
+                pnl_usd = (exit_price - trade['entry']) * trade['quantity'] - fees
             else:
-                pnl_usd = (trade['entry'] - exit_price) * trade['quantity']
+                pnl_usd = (trade['entry'] - exit_price) * trade['quantity'] - fees
             
             pnl_percent = (pnl_usd / (trade['entry'] * trade['quantity'])) * 100
             duration = datetime.now() - trade['timestamp']
@@ -233,9 +458,11 @@ class SwingTradingBot:
                     'exit_price': exit_price,
                     'pnl_usd': pnl_usd,
                     'pnl_percent': pnl_percent,
+                    'fees': fees,
                     'notes': f"Exit: {reason}"
                 }
-                self.trade_logger.log_trade_exit(trade['trade_id'], exit_data)
+                with self.recorder.stage('log'):
+                    self.trade_logger.log_trade_exit(trade['trade_id'], exit_data)
             
             # Send Telegram alert
             if self.telegram:
@@ -251,7 +478,8 @@ class SwingTradingBot:
                     'pnl_percent': pnl_percent,
                     'exit_reason': reason
                 }
-                self.telegram.send_trade_alert(alert_data)
+                with self.recorder.stage('notify'):
+                    self.telegram.send_trade_alert(alert_data)
             
             self.logger.info(f"Trade exited: {symbol} - {reason} - P&L: ${pnl_usd:.2f}")
             
@@ -263,28 +491,53 @@ class SwingTradingBot:
         if not self.is_running:
             return
         
+        self.cycle_id += 1
+        self.recorder.start_cycle(self.cycle_id)
+        self.profiler.start_cycle(self.cycle_id)
+        error = None
+        try:
+            self.run_cycle()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.profiler.end_cycle(self.cycle_id)
+            record = self.recorder.end_cycle(error)
+            if FLIGHT_SLOW_CYCLE_SECONDS and record and record['total'] > FLIGHT_SLOW_CYCLE_SECONDS:
+                self.logger.warning(f"Slow cycle #{self.cycle_id}: {record['total']:.1f}s {record['stages']}")
+                self.recorder.dump('slow')
+    
+    def run_cycle(self):
+        """Balance check, exits, scan and entries for one cycle"""
+        cycle_started = time.perf_counter()
         self.logger.info("="*60)
-        self.logger.info(f"Trading cycle #{self.trade_count + 1}")
+        self.logger.info(f"Trading cycle #{self.cycle_id}", extra=self.log_context('cycle'))
         
         # Check account balance
-        balance = self.check_account_balance()
+        with self.recorder.stage('balance'):
+            balance = self.check_account_balance()
         if balance < 10:
             self.logger.warning(f"Insufficient balance: ${balance:.2f}")
             return
         
         # Monitor existing trades
-        self.monitor_trades()
+        with self.recorder.stage('monitor'):
+            self.monitor_trades()
         
         # Scan for new setups if we have capacity
         if len(self.active_trades) < self.risk_manager.max_positions:
             signals = self.scan_markets()
             
-            # Execute new trades
-            for symbol, signal in signals.items():
-                if self.is_running:
-                    self.execute_trade(symbol, signal)
+            # Execute new trades while capacity remains; the rest are retried next cycle
+            for symbol, (key, signal) in signals.items():
+                if not self.is_running or len(self.active_trades) >= self.risk_manager.max_positions:
+                    break
+                if self.execute_trade(symbol, signal):
+                    with self.recorder.stage('log'):
+                        self.signal_cache.put(key, signal)
         
-        self.logger.info(f"Cycle complete. Active trades: {len(self.active_trades)}")
+        self.logger.info(f"Cycle complete. Active trades: {len(self.active_trades)}",
+                         extra=self.log_context('cycle', started=cycle_started))
         self.logger.info("="*60)
     
     def run(self):
@@ -294,12 +547,12 @@ class SwingTradingBot:
         # Schedule to run every 4 hours
         schedule.every(1).hours.do(self.run_iteration)
         
-        # Initial run
-        self.run_iteration()
-        
-        # Main loop
-        self.logger.info("Bot scheduler started")
         try:
+            # Initial run
+            self.run_iteration()
+            
+            # Main loop
+            self.logger.info("Bot scheduler started")
             while self.is_running:
                 schedule.run_pending()
                 time.sleep(60)  # Check every minute
@@ -309,6 +562,17 @@ class SwingTradingBot:
             if self.telegram:
                 self.telegram.send_message("🛑 Bot stopped by user command")
         except Exception as e:
-            self.logger.error(f"Bot crashed: {e}")
+            self.logger.exception(f"Bot crashed: {e}")
+            self.recorder.dump('crash')
             if self.telegram:
-                self.telegram.send_message(f"🚨 Bot crashed: {str(e)[:100]}")
\ No newline at end of file
+                self.telegram.send_message(f"🚨 Bot crashed: {str(e)[:100]}")
+        finally:
+            if self.control_server:
+                self.control_server.stop()
+            if self.order_manager:
+                self.order_manager.stop()
+            if self.scanner:
+                self.scanner.stop()
+            self.trade_logger.close()
+            # Flush queued log records
+            self.log_listener.stop()
\ No newline at end of file
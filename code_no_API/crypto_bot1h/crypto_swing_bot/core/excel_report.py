@@ -0,0 +1,234 @@
+"""
+Excel trade report - streamed from the trade store in the background
+"""
+import os
+import sys
+import sqlite3
+import logging
+import threading
+import multiprocessing as mp
+from datetime import datetime
+from typing import List
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+logger = logging.getLogger(__name__)
+
+TRADE_COLUMNS = [
+    'Trade_ID', 'Symbol', 'Side', 'Status',
+    'Entry_Price', 'Exit_Price', 'Quantity',
+    'Entry_Time', 'Exit_Time', 'Duration',
+    'Stop_Loss', 'Take_Profit',
+    'PnL_USD', 'PnL_Percent', 'Risk_Reward',
+    'Trade_Reason', 'Strategy_Used',
+    'Confidence', 'Notes'
+]
+TIME_COLUMNS = {'Entry_Time', 'Exit_Time'}
+PNL_COLUMNS = ['PnL_USD', 'PnL_Percent']
+
+PROFIT_FILL = PatternFill(start_color='C6EFCE', end_color='C6EFCE', fill_type='solid')
+LOSS_FILL = PatternFill(start_color='FFC7CE', end_color='FFC7CE', fill_type='solid')
+HEADER_FONT = Font(bold=True)
+
+FETCH_SIZE = 5000  # Rows held in memory at a time
+
+
+class ExcelReportWriter:
+    """Materializes trade_history.xlsx from the SQLite trade store
+
+    A background thread schedules builds at most once per min_interval and
+    runs each in a child process, so openpyxl's CPU time never competes with
+    the trading loop for the GIL. Write-only mode keeps memory flat regardless
+    of row count. The file is written next to the target and renamed into
+    place, so a reader never sees a partial workbook and a locked workbook
+    never blocks trade logging.
+    """
+
+    def __init__(self, db_path: str, excel_path: str, min_interval: float = 60):
+        self.db_path = db_path
+        self.excel_path = excel_path
+        self.min_interval = min_interval
+        self.requested = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='excel-report', daemon=True)
+        self.ctx = mp.get_context('spawn')
+
+    def start(self):
+        # Left behind if a previous run was killed mid-write
+        tmp_path = f"{self.excel_path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        self.thread.start()
+
+    def request(self):
+        """Ask for a fresh report; repeated requests are coalesced"""
+        self.requested.set()
+
+    def stop(self):
+        """Write a final report and stop the worker, however long the build takes"""
+        self.stopping.set()
+        self.requested.set()
+        if self.thread.is_alive():
+            logger.info("Waiting for the final trade report")
+            self.thread.join()
+
+    def run(self):
+        while True:
+            self.requested.wait()
+            self.requested.clear()
+            if not self.build():
+                if self.stopping.is_set():
+                    break
+                self.requested.set()  # Retry on the next round
+            # Trades logged during the last build still need a report
+            if self.stopping.is_set() and not self.requested.is_set():
+                break
+            self.stopping.wait(self.min_interval)
+
+    def build(self) -> bool:
+        """Materialize in a child process; False if it couldn't be written"""
+        process = self.ctx.Process(target=materialize_report, args=(self.db_path, self.excel_path),
+                                   name='excel-report-build')
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            logger.warning(f"Trade report build exited with {process.exitcode}, will retry")
+            return False
+        logger.info(f"Trade report written: {self.excel_path}")
+        return True
+
+    def materialize(self) -> bool:
+        """Build the workbook; False if it couldn't be written"""
+        tmp_path = f"{self.excel_path}.tmp"
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                wb = Workbook(write_only=True)
+                self.write_summary(wb, conn)
+                self.write_trades(wb.create_sheet('Trades'), conn.execute(
+                    f"SELECT {', '.join(TRADE_COLUMNS)} FROM trades ORDER BY rowid"))
+
+                symbols = [row[0] for row in conn.execute(
+                    "SELECT DISTINCT Symbol FROM trades WHERE Symbol IS NOT NULL ORDER BY Symbol")]
+                for symbol in symbols:
+                    self.write_trades(wb.create_sheet(str(symbol)[:31]), conn.execute(
+                        f"SELECT {', '.join(TRADE_COLUMNS)} FROM trades WHERE Symbol = ? ORDER BY rowid",
+                        (symbol,)))
+
+                wb.save(tmp_path)
+            finally:
+                conn.close()
+
+            os.replace(tmp_path, self.excel_path)
+            return True
+
+        except PermissionError as e:
+            # Usually the workbook is open in Excel on Windows
+            logger.warning(f"Trade report locked, will retry: {e}")
+        except Exception as e:
+            logger.error(f"Failed to write trade report: {e}")
+
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    def write_summary(self, wb: Workbook, conn: sqlite3.Connection):
+        """Overall and per-symbol performance"""
+        ws = wb.create_sheet('Summary')
+        ws.append(self.header_row(ws, ['Metric', 'Value']))
+
+        total, open_trades, closed, wins, losses, pnl, avg_pnl = conn.execute("""
+            SELECT COUNT(*),
+                   SUM(Status = 'OPEN'),
+                   SUM(Status = 'CLOSED'),
+                   SUM(Status = 'CLOSED' AND PnL_USD > 0),
+                   SUM(Status = 'CLOSED' AND PnL_USD < 0),
+                   COALESCE(SUM(PnL_USD), 0),
+                   AVG(CASE WHEN Status = 'CLOSED' THEN PnL_USD END)
+            FROM trades
+        """).fetchone()
+        closed = closed or 0
+        win_rate = round((wins or 0) / closed * 100, 2) if closed else 0
+
+        metrics = [
+            ('Total Trades', total), ('Open', open_trades or 0), ('Closed', closed),
+            ('Wins', wins or 0), ('Losses', losses or 0), ('Win Rate %', win_rate),
+            ('Total PnL USD', round(pnl, 2)), ('Avg PnL USD', round(avg_pnl or 0, 2)),
+            ('Generated', datetime.now())
+        ]
+        for metric, value in metrics:
+            ws.append([metric, value])
+
+        ws.append([])
+        headers = ['Symbol', 'Trades', 'Closed', 'Wins', 'Win_Rate', 'PnL_USD']
+        ws.append(self.header_row(ws, headers))
+        first_row = len(metrics) + 4  # Header, metrics, blank row, table header
+        rows = 0
+        for symbol, trades, sym_closed, sym_wins, sym_pnl in conn.execute("""
+            SELECT Symbol, COUNT(*), SUM(Status = 'CLOSED'),
+                   SUM(Status = 'CLOSED' AND PnL_USD > 0), COALESCE(SUM(PnL_USD), 0)
+            FROM trades GROUP BY Symbol ORDER BY Symbol
+        """):
+            sym_rate = round((sym_wins or 0) / sym_closed * 100, 2) if sym_closed else 0
+            ws.append([symbol, trades, sym_closed or 0, sym_wins or 0, sym_rate, round(sym_pnl, 2)])
+            rows += 1
+
+        self.color_pnl(ws, ['F'], first_row, first_row + rows - 1)
+
+    def write_trades(self, ws, cursor: sqlite3.Cursor):
+        """Stream trade rows into a sheet"""
+        ws.freeze_panes = 'A2'
+        ws.append(self.header_row(ws, TRADE_COLUMNS))
+
+        time_idx = [i for i, col in enumerate(TRADE_COLUMNS) if col in TIME_COLUMNS]
+        rows = 0
+        while True:
+            batch = cursor.fetchmany(FETCH_SIZE)
+            if not batch:
+                break
+            for row in batch:
+                row = list(row)
+                for i in time_idx:
+                    row[i] = self.parse_time(row[i])
+                ws.append(row)
+            rows += len(batch)
+
+        pnl_letters = [get_column_letter(TRADE_COLUMNS.index(col) + 1) for col in PNL_COLUMNS]
+        self.color_pnl(ws, pnl_letters, 2, rows + 1)
+
+    @staticmethod
+    def header_row(ws, headers: List[str]) -> List[WriteOnlyCell]:
+        cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = HEADER_FONT
+            cells.append(cell)
+        return cells
+
+    @staticmethod
+    def color_pnl(ws, letters: List[str], first_row: int, last_row: int):
+        """Green for profits, red for losses"""
+        if last_row < first_row:
+            return
+        for letter in letters:
+            cell_range = f"{letter}{first_row}:{letter}{last_row}"
+            ws.conditional_formatting.add(cell_range, CellIsRule(operator='greaterThan', formula=['0'], fill=PROFIT_FILL))
+            ws.conditional_formatting.add(cell_range, CellIsRule(operator='lessThan', formula=['0'], fill=LOSS_FILL))
+
+    @staticmethod
+    def parse_time(value):
+        if not value:
+            return value
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            return value
+
+
+def materialize_report(db_path: str, excel_path: str):
+    """Child process entry point; the exit code tells the writer whether it worked"""
+    sys.exit(0 if ExcelReportWriter(db_path, excel_path).materialize() else 1)
@@ -0,0 +1,423 @@
+"""
+Exchange adapters - normalized market data and account access per venue
+"""
+import asyncio
+import glob
+import logging
+import os
+import zlib
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+KLINE_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume',
+    'close_time', 'quote_asset_volume', 'number_of_trades',
+    'taker_buy_base', 'taker_buy_quote', 'ignore'
+]
+
+
+def klines_to_frame(klines) -> pd.DataFrame:
+    """Normalize Binance-style kline rows into a DataFrame"""
+    df = pd.DataFrame(klines, columns=KLINE_COLUMNS)
+
+    # Convert to numeric
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        df[col] = pd.to_numeric(df[col])
+    for col in ['timestamp', 'close_time']:
+        df[col] = pd.to_numeric(df[col]).astype('int64')
+
+    return df
+
+
+class ExchangeAdapter:
+    """Interface shared by all venues
+
+    Sync methods block; the *_async variants run them in a worker thread so
+    several venues or symbols can be queried concurrently.
+    """
+    name = 'base'
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 100,
+                   start_time: Optional[int] = None) -> pd.DataFrame:
+        """Klines as a DataFrame with KLINE_COLUMNS"""
+        raise NotImplementedError(f"{self.name} does not support get_klines")
+
+    def get_ticker(self, symbol: str) -> float:
+        """Last traded price"""
+        raise NotImplementedError(f"{self.name} does not support get_ticker")
+
+    def get_order_book(self, symbol: str, limit: int = 100) -> Dict[str, List[Tuple[float, float]]]:
+        """{'bids': [(price, qty), ...], 'asks': [...]}, best first"""
+        raise NotImplementedError(f"{self.name} does not support get_order_book")
+
+    def get_recent_trades(self, symbol: str, limit: int = 50) -> List[Dict]:
+        """[{'price', 'qty', 'time'}, ...], oldest first"""
+        raise NotImplementedError(f"{self.name} does not support get_recent_trades")
+
+    def get_balance(self, asset: str) -> float:
+        """Free balance of an asset"""
+        raise NotImplementedError(f"{self.name} does not support get_balance")
+
+    def get_exchange_info(self) -> Dict[str, Dict]:
+        """{symbol: {'base', 'quote', 'tick_size', 'step_size', 'min_notional'}}"""
+        raise NotImplementedError(f"{self.name} does not support get_exchange_info")
+
+    def place_market_order(self, symbol: str, side: str, quantity: str,
+                           client_order_id: Optional[str] = None) -> Dict:
+        """{'order_id', 'price' (average), 'quantity', 'commission', 'commission_asset'}"""
+        raise NotImplementedError(f"{self.name} does not support place_market_order")
+
+    def place_oco_order(self, symbol: str, side: str, quantity: str, take_profit: str,
+                        stop_price: str, stop_limit_price: str, list_client_id: str) -> Dict:
+        """Take-profit limit + stop-limit pair; {'list_id'}
+
+        Leg client ids are list_client_id + '_tp' / '_sl'.
+        """
+        raise NotImplementedError(f"{self.name} does not support place_oco_order")
+
+    def cancel_order(self, symbol: str, client_order_id: str):
+        """Cancel an open order; cancelling one OCO leg cancels the whole list"""
+        raise NotImplementedError(f"{self.name} does not support cancel_order")
+
+    def get_open_oco_orders(self) -> List[Dict]:
+        """[{'list_id', 'symbol', 'list_client_id'}, ...]"""
+        raise NotImplementedError(f"{self.name} does not support get_open_oco_orders")
+
+    def get_order_history(self, symbol: str, start_time: Optional[int] = None) -> List[Dict]:
+        """[{'order_id', 'client_order_id', 'list_id', 'type', 'status', 'price', 'quantity'}, ...]"""
+        raise NotImplementedError(f"{self.name} does not support get_order_history")
+
+    def start_user_stream(self, callback: Callable[[Dict], None]):
+        """Push order updates to callback as {'type': 'order', ...} events"""
+        raise NotImplementedError(f"{self.name} does not support start_user_stream")
+
+    def stop_user_stream(self):
+        pass
+
+    async def get_klines_async(self, *args, **kwargs) -> pd.DataFrame:
+        return await asyncio.to_thread(self.get_klines, *args, **kwargs)
+
+    async def get_ticker_async(self, *args, **kwargs) -> float:
+        return await asyncio.to_thread(self.get_ticker, *args, **kwargs)
+
+    async def get_balance_async(self, *args, **kwargs) -> float:
+        return await asyncio.to_thread(self.get_balance, *args, **kwargs)
+
+    async def get_exchange_info_async(self) -> Dict[str, Dict]:
+        return await asyncio.to_thread(self.get_exchange_info)
+
+    async def stream_klines(self, symbol: str, interval: str,
+                            poll_seconds: float = 60) -> AsyncIterator[pd.DataFrame]:
+        """Yield each newly opened kline (with the one before it, now closed)"""
+        last_open = None
+        while True:
+            df = await self.get_klines_async(symbol, interval, limit=2)
+            if not df.empty and df['timestamp'].iloc[-1] != last_open:
+                last_open = df['timestamp'].iloc[-1]
+                yield df
+            await asyncio.sleep(poll_seconds)
+
+    async def stream_tickers(self, symbols: List[str],
+                             poll_seconds: float = 5) -> AsyncIterator[Dict[str, float]]:
+        """Yield {symbol: price} snapshots"""
+        while True:
+            prices = await asyncio.gather(*(self.get_ticker_async(s) for s in symbols))
+            yield dict(zip(symbols, prices))
+            await asyncio.sleep(poll_seconds)
+
+
+class BinanceAdapter(ExchangeAdapter):
+    def __init__(self, api_key: str = '', api_secret: str = '', tld: str = 'us'):
+        from binance.client import Client
+
+        self.name = f"binance_{tld}"
+        self.tld = tld
+        self.api_key = api_key or None
+        self.api_secret = api_secret or None
+        self.client = Client(api_key=self.api_key, api_secret=self.api_secret, tld=tld)
+        self.socket_manager = None
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 100,
+                   start_time: Optional[int] = None) -> pd.DataFrame:
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+        if start_time is not None:
+            params['startTime'] = int(start_time)
+        return klines_to_frame(self.client.get_klines(**params))
+
+    def get_ticker(self, symbol: str) -> float:
+        return float(self.client.get_symbol_ticker(symbol=symbol)['price'])
+
+    def get_order_book(self, symbol: str, limit: int = 100) -> Dict[str, List[Tuple[float, float]]]:
+        book = self.client.get_order_book(symbol=symbol, limit=limit)
+        return {
+            'bids': [(float(p), float(q)) for p, q in book['bids']],
+            'asks': [(float(p), float(q)) for p, q in book['asks']]
+        }
+
+    def get_recent_trades(self, symbol: str, limit: int = 50) -> List[Dict]:
+        trades = self.client.get_recent_trades(symbol=symbol, limit=limit)
+        return [
+            {'price': float(t['price']), 'qty': float(t['qty']), 'time': int(t['time'])}
+            for t in trades
+        ]
+
+    def get_balance(self, asset: str) -> float:
+        balance = self.client.get_asset_balance(asset=asset)
+        return float(balance['free']) if balance else 0.0
+
+    def get_exchange_info(self) -> Dict[str, Dict]:
+        info = {}
+        for s in self.client.get_exchange_info()['symbols']:
+            filters = {f['filterType']: f for f in s['filters']}
+            notional = filters.get('NOTIONAL') or filters.get('MIN_NOTIONAL') or {}
+            info[s['symbol']] = {
+                'base': s['baseAsset'],
+                'quote': s['quoteAsset'],
+                'tick_size': float(filters.get('PRICE_FILTER', {}).get('tickSize', 0)),
+                'step_size': float(filters.get('LOT_SIZE', {}).get('stepSize', 0)),
+                'min_notional': float(notional.get('minNotional', 0))
+            }
+        return info
+
+    def place_market_order(self, symbol: str, side: str, quantity: str,
+                           client_order_id: Optional[str] = None) -> Dict:
+        params = {'symbol': symbol, 'side': side, 'type': 'MARKET', 'quantity': quantity}
+        if client_order_id:
+            params['newClientOrderId'] = client_order_id
+        order = self.client.create_order(**params)
+
+        executed = float(order['executedQty'])
+        fills = order.get('fills', [])
+        return {
+            'order_id': order['orderId'],
+            'price': float(order['cummulativeQuoteQty']) / executed if executed else 0.0,
+            'quantity': executed,
+            'commission': sum(float(f['commission']) for f in fills),
+            'commission_asset': fills[0]['commissionAsset'] if fills else None
+        }
+
+    def place_oco_order(self, symbol: str, side: str, quantity: str, take_profit: str,
+                        stop_price: str, stop_limit_price: str, list_client_id: str) -> Dict:
+        order_list = self.client.create_oco_order(
+            symbol=symbol,
+            side=side,
+            quantity=quantity,
+            price=take_profit,
+            stopPrice=stop_price,
+            stopLimitPrice=stop_limit_price,
+            stopLimitTimeInForce='GTC',
+            listClientOrderId=list_client_id,
+            limitClientOrderId=f"{list_client_id}_tp",
+            stopClientOrderId=f"{list_client_id}_sl"
+        )
+        return {'list_id': order_list['orderListId']}
+
+    def cancel_order(self, symbol: str, client_order_id: str):
+        self.client.cancel_order(symbol=symbol, origClientOrderId=client_order_id)
+
+    def get_open_oco_orders(self) -> List[Dict]:
+        return [
+            {'list_id': o['orderListId'], 'symbol': o['symbol'], 'list_client_id': o['listClientOrderId']}
+            for o in self.client.get_open_oco_orders()
+        ]
+
+    def get_order_history(self, symbol: str, start_time: Optional[int] = None) -> List[Dict]:
+        params = {'symbol': symbol}
+        if start_time is not None:
+            params['startTime'] = int(start_time)
+        orders = []
+        for o in self.client.get_all_orders(**params):
+            executed = float(o['executedQty'])
+            orders.append({
+                'order_id': o['orderId'],
+                'client_order_id': o['clientOrderId'],
+                'list_id': o['orderListId'],
+                'type': o['type'],
+                'status': o['status'],
+                'price': float(o['cummulativeQuoteQty']) / executed if executed else float(o['price']),
+                'quantity': executed
+            })
+        return orders
+
+    def start_user_stream(self, callback: Callable[[Dict], None]):
+        from binance import ThreadedWebsocketManager
+
+        def handle(msg: Dict):
+            if msg.get('e') == 'executionReport':
+                executed = float(msg['z'])
+                callback({
+                    'type': 'order',
+                    'symbol': msg['s'],
+                    'order_id': msg['i'],
+                    'client_order_id': msg['c'],
+                    'list_id': msg['g'],
+                    'order_type': msg['o'],
+                    'side': msg['S'],
+                    'status': msg['X'],
+                    'price': float(msg['Z']) / executed if executed else float(msg['p']),
+                    'quantity': executed,
+                    'commission': float(msg['n']),
+                    'commission_asset': msg['N']
+                })
+            elif msg.get('e') == 'error':
+                logger.error(f"User data stream error: {msg.get('m')}")
+
+        self.socket_manager = ThreadedWebsocketManager(
+            api_key=self.api_key, api_secret=self.api_secret, tld=self.tld
+        )
+        self.socket_manager.start()
+        self.socket_manager.start_user_socket(callback=handle)
+
+    def stop_user_stream(self):
+        if self.socket_manager:
+            self.socket_manager.stop()
+            self.socket_manager = None
+
+
+class CSVAdapter(ExchangeAdapter):
+    """Reads klines from {data_dir}/{symbol}_{interval}.csv files"""
+    name = 'csv'
+
+    def __init__(self, data_dir: str = 'data/klines', balances: Optional[Dict[str, float]] = None,
+                 ticker_interval: str = '1m'):
+        self.data_dir = data_dir
+        self.balances = balances or {}
+        self.ticker_interval = ticker_interval
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.data_dir, f"{symbol}_{interval}.csv")
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 100,
+                   start_time: Optional[int] = None) -> pd.DataFrame:
+        df = pd.read_csv(self._path(symbol, interval))
+        for col in KLINE_COLUMNS:
+            if col not in df.columns:
+                df[col] = 0
+        df = klines_to_frame(df[KLINE_COLUMNS].values.tolist())
+
+        if start_time is not None:
+            return df[df['timestamp'] >= start_time].head(limit).reset_index(drop=True)
+        return df.tail(limit).reset_index(drop=True)
+
+    def get_ticker(self, symbol: str) -> float:
+        return float(self.get_klines(symbol, self.ticker_interval, limit=1)['close'].iloc[-1])
+
+    def get_balance(self, asset: str) -> float:
+        return float(self.balances.get(asset, 0.0))
+
+    def get_exchange_info(self) -> Dict[str, Dict]:
+        info = {}
+        for path in glob.glob(os.path.join(self.data_dir, '*_*.csv')):
+            symbol = os.path.basename(path).rsplit('_', 1)[0]
+            info[symbol] = {'base': None, 'quote': None, 'tick_size': 0.0,
+                            'step_size': 0.0, 'min_notional': 0.0}
+        return info
+
+
+class ParquetAdapter(ExchangeAdapter):
+    """Reads klines from the Parquet lake written by KlineDownloader"""
+    name = 'parquet'
+
+    def __init__(self, lake_dir: str = 'data/lake', balances: Optional[Dict[str, float]] = None,
+                 ticker_interval: str = '1m'):
+        self.lake_dir = lake_dir
+        self.balances = balances or {}
+        self.ticker_interval = ticker_interval
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 100,
+                   start_time: Optional[int] = None) -> pd.DataFrame:
+        from core.kline_downloader import load_klines
+
+        if start_time is None:
+            df = self.load_tail(symbol, interval, limit)
+        else:
+            df = load_klines(self.lake_dir, symbol, interval, start_time=start_time).head(limit)
+        return df.assign(ignore=0)[KLINE_COLUMNS].reset_index(drop=True)
+
+    def load_tail(self, symbol: str, interval: str, limit: int) -> pd.DataFrame:
+        """Last `limit` bars, reading only the months they can span"""
+        from core.kline_downloader import latest_month, load_klines, month_bounds
+        from core.strategy import interval_to_ms
+
+        interval_ms = interval_to_ms(interval)
+        month = latest_month(self.lake_dir, symbol, interval)
+        if interval_ms and month:
+            last = load_klines(self.lake_dir, symbol, interval, start_time=month_bounds(month)[0],
+                               columns=['timestamp'])
+            if not last.empty:
+                start_time = int(last['timestamp'].iloc[-1]) - (limit - 1) * interval_ms
+                df = load_klines(self.lake_dir, symbol, interval, start_time=start_time)
+                if len(df) >= limit:
+                    return df.tail(limit)
+
+        # Gaps in the data, or less history than asked for
+        return load_klines(self.lake_dir, symbol, interval).tail(limit)
+
+    def get_ticker(self, symbol: str) -> float:
+        return float(self.get_klines(symbol, self.ticker_interval, limit=1)['close'].iloc[-1])
+
+    def get_balance(self, asset: str) -> float:
+        return float(self.balances.get(asset, 0.0))
+
+    def get_exchange_info(self) -> Dict[str, Dict]:
+        info = {}
+        for path in glob.glob(os.path.join(self.lake_dir, 'symbol=*')):
+            symbol = os.path.basename(path).split('=', 1)[1]
+            info[symbol] = {'base': None, 'quote': None, 'tick_size': 0.0,
+                            'step_size': 0.0, 'min_notional': 0.0}
+        return info
+
+
+def create_exchange(name: str, api_key: str = '', api_secret: str = '',
+                    data_dir: str = 'data/klines', lake_dir: str = 'data/lake',
+                    paper_balance: float = 0.0) -> ExchangeAdapter:
+    """Build an adapter from its config name
+
+    Offline venues (csv, parquet) report paper_balance USDT, so they can
+    stand in as the trading venue in SAFE MODE.
+    """
+    if name == 'binance_us':
+        return BinanceAdapter(api_key, api_secret, tld='us')
+    if name == 'binance_com':
+        return BinanceAdapter(api_key, api_secret, tld='com')
+    if name == 'csv':
+        return CSVAdapter(data_dir, balances={'USDT': paper_balance})
+    if name == 'parquet':
+        return ParquetAdapter(lake_dir, balances={'USDT': paper_balance})
+    raise ValueError(f"Unknown exchange: {name}")
+
+
+def venue_order(symbol: str, venues: int) -> List[int]:
+    """Venue indexes to try for a symbol: a fixed primary, then the rest
+
+    The primary comes from a stable hash so a symbol is always read from the
+    same venue, across cycles and across scan worker processes.
+    """
+    primary = zlib.crc32(symbol.encode()) % venues
+    return [primary] + [i for i in range(venues) if i != primary]
+
+
+async def fetch_klines_many(adapters: List[ExchangeAdapter], symbols: List[str], interval: str,
+                            limit: int = 100, max_concurrency: int = 5) -> Dict[str, object]:
+    """Fetch klines for many symbols, each pinned to one venue with the others as fallback
+
+    Returns {symbol: DataFrame or the last Exception}.
+    """
+    semaphores = [asyncio.Semaphore(max_concurrency) for _ in adapters]
+
+    async def fetch(symbol: str):
+        error = None
+        for idx in venue_order(symbol, len(adapters)):
+            async with semaphores[idx]:
+                try:
+                    return await adapters[idx].get_klines_async(symbol, interval, limit=limit)
+                except Exception as e:
+                    logger.debug(f"{symbol} klines failed on {adapters[idx].name}: {e}")
+                    error = e
+        return error
+
+    results = await asyncio.gather(*(fetch(s) for s in symbols))
+    return dict(zip(symbols, results))
@@ -0,0 +1,242 @@
+"""
+Simulated order execution for SAFE MODE paper trades and backtests
+"""
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+EXIT_COLUMNS = ['exit_reason', 'exit_price', 'exit_fee', 'exit_time']
+EXIT_SCAN_CHUNK = 256           # Bars checked per open trade in the first exit-scan window
+MAX_SCAN_CELLS = 4_000_000      # Cap on trades x bars held in memory per window
+
+
+class ExecutionSimulator:
+    def __init__(self, latency_ms: float = 250, slippage_bps: float = 5.0,
+                 fee_rate: float = 0.001, book_depth: int = 100):
+        self.latency_ms = latency_ms      # Delay between decision and fill
+        self.slippage_bps = slippage_bps  # Extra adverse slippage on market fills
+        self.fee_rate = fee_rate          # Fee charged on fill notional (0.1% = Binance.US taker)
+        self.book_depth = book_depth      # Order book levels walked for entry fills
+
+    def apply_costs(self, prices, order_sides, quantities) -> Tuple[np.ndarray, np.ndarray]:
+        """Apply slippage and fees to arrays of market fills"""
+        prices = np.asarray(prices, dtype=float)
+        quantities = np.asarray(quantities, dtype=float)
+        sign = np.where(np.asarray(order_sides) == 'BUY', 1.0, -1.0)
+
+        fill_prices = prices * (1 + sign * self.slippage_bps / 10000)
+        fees = fill_prices * quantities * self.fee_rate
+        return fill_prices, fees
+
+    def walk_book(self, levels: List[Tuple[float, float]], quantity: float) -> Optional[float]:
+        """Average fill price for a quantity swept through order book levels"""
+        if not levels or quantity <= 0:
+            return None
+
+        book = np.asarray(levels, dtype=float)
+        prices, sizes = book[:, 0], book[:, 1]
+
+        # Quantity taken from each level
+        filled_before = np.cumsum(sizes) - sizes
+        taken = np.clip(quantity - filled_before, 0, sizes)
+        cost = float((taken * prices).sum())
+
+        # Anything beyond the visible book fills at the last level
+        remaining = quantity - float(taken.sum())
+        if remaining > 0:
+            cost += remaining * prices[-1]
+
+        return cost / quantity
+
+    def fill_market_order(self, exchange, symbol: str, order_side: str, quantity: float,
+                          reference_price: float, decision_time: Optional[float] = None) -> Dict:
+        """Simulate a market order against the live order book"""
+        # Model latency: the book is read no earlier than decision + latency
+        if decision_time is not None:
+            wait = decision_time + self.latency_ms / 1000 - time.time()
+            if wait > 0:
+                time.sleep(wait)
+
+        price = None
+        source = 'reference'
+
+        try:
+            book = exchange.get_order_book(symbol=symbol, limit=self.book_depth)
+            side_levels = book['asks'] if order_side == 'BUY' else book['bids']
+            price = self.walk_book(side_levels, quantity)
+            source = 'order_book'
+        except Exception as e:
+            logger.warning(f"Order book unavailable for {symbol}: {e}")
+
+        if price is None:
+            try:
+                trades = exchange.get_recent_trades(symbol=symbol, limit=50)
+                price = trades[-1]['price']
+                source = 'recent_trades'
+            except Exception as e:
+                logger.warning(f"Recent trades unavailable for {symbol}: {e}")
+
+        if price is None:
+            price = reference_price
+
+        fill_prices, fees = self.apply_costs([price], [order_side], [quantity])
+        return {
+            'price': float(fill_prices[0]),
+            'fee': float(fees[0]),
+            'source': source
+        }
+
+    def simulate_entries(self, orders: pd.DataFrame, bars: pd.DataFrame) -> pd.DataFrame:
+        """Fill a batch of entry orders at the first bar open after signal time + latency
+
+        orders: symbol, side (LONG/SHORT), quantity, signal_time (ms)
+        bars: symbol, timestamp (ms), open
+        """
+        orders = orders.copy()
+        orders['fill_after'] = (orders['signal_time'] + self.latency_ms).astype('int64')
+
+        fills = pd.merge_asof(
+            orders.sort_values('fill_after'),
+            bars[['symbol', 'timestamp', 'open']].sort_values('timestamp'),
+            left_on='fill_after',
+            right_on='timestamp',
+            by='symbol',
+            direction='forward'
+        ).dropna(subset=['open'])
+
+        order_sides = np.where(fills['side'] == 'LONG', 'BUY', 'SELL')
+        fill_prices, fees = self.apply_costs(fills['open'], order_sides, fills['quantity'])
+
+        fills['entry_price'] = fill_prices
+        fills['entry_fee'] = fees
+        fills['entry_time'] = fills['timestamp'].astype('int64')
+        return fills.drop(columns=['fill_after', 'timestamp', 'open'])
+
+    def simulate_exits(self, trades: pd.DataFrame, bars: pd.DataFrame) -> pd.DataFrame:
+        """Find the first stop loss / take profit touch for each trade along its high/low path
+
+        trades: symbol, side, quantity, stop_loss, take_profit, entry_time (ms)
+        bars: symbol, timestamp (ms), close_time (ms), open, high, low
+        Returns one row per exited trade, indexed like trades.
+        """
+        touches = []
+        bar_rows = bars.groupby('symbol', sort=False).indices
+        for symbol, group in trades.groupby('symbol', sort=False):
+            if symbol not in bar_rows:
+                continue
+            path = bars.iloc[bar_rows[symbol]].sort_values('timestamp', kind='stable')
+
+            # Each trade's path starts at the first bar opening at or after entry
+            start = np.searchsorted(path['timestamp'].to_numpy(), group['entry_time'].to_numpy(), side='left')
+            bar_idx, stop_hit = self.first_touches(
+                start,
+                (group['side'] == 'LONG').to_numpy(),
+                group['stop_loss'].to_numpy(dtype=float),
+                group['take_profit'].to_numpy(dtype=float),
+                path['high'].to_numpy(dtype=float),
+                path['low'].to_numpy(dtype=float)
+            )
+
+            hit = bar_idx >= 0
+            touches.append(pd.DataFrame({
+                'side': group['side'].to_numpy()[hit],
+                'quantity': group['quantity'].to_numpy()[hit],
+                'stop_loss': group['stop_loss'].to_numpy()[hit],
+                'take_profit': group['take_profit'].to_numpy()[hit],
+                'stop_hit': stop_hit[hit],
+                'open': path['open'].to_numpy()[bar_idx[hit]],
+                'close_time': path['close_time'].to_numpy()[bar_idx[hit]]
+            }, index=group.index[hit]))
+
+        first = pd.concat(touches) if touches else None
+        if first is None or first.empty:
+            return pd.DataFrame(columns=EXIT_COLUMNS)
+
+        # Intrabar order is unknown, so a bar touching both levels counts as a stop
+        is_long = (first['side'] == 'LONG').to_numpy()
+        is_stop = first['stop_hit'].to_numpy()
+        bar_open = first['open'].to_numpy(dtype=float)
+        stop = first['stop_loss'].to_numpy(dtype=float)
+        target = first['take_profit'].to_numpy(dtype=float)
+
+        # Stops are market orders: gaps through the level fill at the open, plus slippage
+        stop_price = np.where(is_long, np.minimum(bar_open, stop), np.maximum(bar_open, stop))
+        order_sides = np.where(is_long, 'SELL', 'BUY')
+        stop_fill, _ = self.apply_costs(stop_price, order_sides, first['quantity'])
+
+        # Take profits rest as limit orders and fill at the level
+        exit_price = np.where(is_stop, stop_fill, target)
+        exit_fee = exit_price * first['quantity'].to_numpy(dtype=float) * self.fee_rate
+
+        exits = pd.DataFrame({
+            'exit_reason': np.where(is_stop, 'STOP_LOSS', 'TAKE_PROFIT'),
+            'exit_price': exit_price,
+            'exit_fee': exit_fee,
+            'exit_time': first['close_time'].to_numpy()
+        }, index=first.index)
+        return exits.loc[[key for key in trades.index if key in exits.index]]
+
+    @staticmethod
+    def first_touches(start: np.ndarray, is_long: np.ndarray, stop: np.ndarray, target: np.ndarray,
+                      high: np.ndarray, low: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Index of the first bar from `start` touching each trade's stop or target
+
+        Returns (bar index or -1, stop touched). Open trades are scanned forward
+        a window at a time, so work is bounded by how long trades stay open and
+        memory by MAX_SCAN_CELLS, not trades x bars.
+        """
+        n_bars = len(high)
+        bar_idx = np.full(len(start), -1, dtype=np.int64)
+        stop_hit = np.zeros(len(start), dtype=bool)
+        pos = np.asarray(start, dtype=np.int64).copy()
+        pending = np.flatnonzero(pos < n_bars)
+        width = EXIT_SCAN_CHUNK
+
+        while pending.size:
+            # Most trades exit early; widen the window for the ones that don't
+            window = max(1, min(width, MAX_SCAN_CELLS // pending.size))
+            idx = pos[pending, None] + np.arange(window)
+            in_range = idx < n_bars
+            idx = np.minimum(idx, n_bars - 1)
+
+            longs = is_long[pending, None]
+            bar_high, bar_low = high[idx], low[idx]
+            stops, targets = stop[pending, None], target[pending, None]
+            stop_touch = np.where(longs, bar_low <= stops, bar_high >= stops) & in_range
+            target_touch = np.where(longs, bar_high >= targets, bar_low <= targets) & in_range
+
+            touched = stop_touch | target_touch
+            found = touched.any(axis=1)
+            offset = touched.argmax(axis=1)[found]
+            bar_idx[pending[found]] = idx[found, offset]
+            stop_hit[pending[found]] = stop_touch[found, offset]
+
+            pos[pending] += window
+            pending = pending[~found & (pos[pending] < n_bars)]
+            width *= 2
+
+        return bar_idx, stop_hit
+
+    def check_exit(self, symbol: str, trade: Dict, bars: pd.DataFrame) -> Optional[Dict]:
+        """Check a single paper trade against bars printed since entry"""
+        if bars.empty:
+            return None
+
+        trades = pd.DataFrame([{
+            'symbol': symbol,
+            'side': trade['side'],
+            'quantity': trade['quantity'],
+            'stop_loss': trade['stop_loss'],
+            'take_profit': trade['take_profit'],
+            'entry_time': trade['entry_time_ms']
+        }], index=[symbol])
+
+        exits = self.simulate_exits(trades, bars.assign(symbol=symbol))
+        if exits.empty:
+            return None
+        return exits.iloc[0].to_dict()
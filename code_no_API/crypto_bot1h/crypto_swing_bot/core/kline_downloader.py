@@ -0,0 +1,271 @@
+"""
+Bulk historical klines - Binance public archives into a partitioned Parquet lake
+"""
+import calendar
+import hashlib
+import io
+import logging
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import pandas as pd
+import requests
+
+from core.exchanges import KLINE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_URL = "https://data.binance.vision"
+DEFAULT_LAKE_DIR = "data/lake"
+LAKE_COLUMNS = [col for col in KLINE_COLUMNS if col != 'ignore']
+INT_COLUMNS = ['timestamp', 'close_time', 'number_of_trades']
+
+
+def month_range(start: str, end: str) -> List[str]:
+    """Months from start to end inclusive, as YYYY-MM"""
+    year, month = map(int, start.split('-'))
+    end_year, end_month = map(int, end.split('-'))
+    months = []
+    while (year, month) <= (end_year, end_month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def month_bounds(month: str):
+    """(start_ms, end_ms) of a UTC month, end exclusive"""
+    year, mon = map(int, month.split('-'))
+    start = datetime(year, mon, 1, tzinfo=timezone.utc)
+    end = start + timedelta(days=calendar.monthrange(year, mon)[1])
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+
+def previous_month(month: str) -> str:
+    year, mon = map(int, month.split('-'))
+    return f"{year - 1:04d}-12" if mon == 1 else f"{year:04d}-{mon - 1:02d}"
+
+
+def normalize_archive(df: pd.DataFrame) -> pd.DataFrame:
+    """Archive CSV rows to lake columns and dtypes"""
+    df = df.iloc[:, :len(KLINE_COLUMNS)]
+    df.columns = KLINE_COLUMNS
+    df = df.drop(columns=['ignore'])
+
+    for col in INT_COLUMNS:
+        df[col] = pd.to_numeric(df[col]).astype('int64')
+    for col in ['open', 'high', 'low', 'close', 'volume',
+                'quote_asset_volume', 'taker_buy_base', 'taker_buy_quote']:
+        df[col] = pd.to_numeric(df[col]).astype('float64')
+
+    # Spot archives switched to microsecond timestamps in 2025
+    for col in ['timestamp', 'close_time']:
+        in_micros = df[col] > 10**14
+        df.loc[in_micros, col] = df.loc[in_micros, col] // 1000
+
+    return df
+
+
+class KlineDownloader:
+    """Download klines into {root}/symbol=X/interval=Y/month=YYYY-MM/part.parquet
+
+    Finished months are skipped, so an interrupted run resumes where it stopped.
+    Monthly archives are tried first, then daily archives, then the REST API
+    through `fallback_exchange` for bars not archived yet.
+    """
+
+    def __init__(self, root: str = DEFAULT_LAKE_DIR, base_url: str = ARCHIVE_URL,
+                 market_path: str = "data/spot", workers: int = 8,
+                 fallback_exchange=None, timeout: float = 30):
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+        self.market_path = market_path
+        self.workers = workers
+        self.fallback_exchange = fallback_exchange
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def partition_path(self, symbol: str, interval: str, month: str) -> str:
+        return os.path.join(self.root, f"symbol={symbol}", f"interval={interval}",
+                            f"month={month}", "part.parquet")
+
+    def archive_url(self, symbol: str, interval: str, period: str, date: str) -> str:
+        return (f"{self.base_url}/{self.market_path}/{period}/klines/"
+                f"{symbol}/{interval}/{symbol}-{interval}-{date}.zip")
+
+    def fetch(self, url: str) -> Optional[bytes]:
+        """GET a file, None if it doesn't exist"""
+        response = self.session.get(url, timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.content
+
+    def download_archive(self, url: str) -> Optional[pd.DataFrame]:
+        """Fetch, checksum and unpack one archive"""
+        data = self.fetch(url)
+        if data is None:
+            return None
+
+        checksum = self.fetch(url + '.CHECKSUM')
+        if checksum is not None:
+            expected = checksum.decode().split()[0].lower()
+            actual = hashlib.sha256(data).hexdigest()
+            if actual != expected:
+                raise ValueError(f"Checksum mismatch for {url}")
+        else:
+            logger.warning(f"No checksum published for {url}")
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            with archive.open(archive.namelist()[0]) as f:
+                df = pd.read_csv(f, header=None)
+
+        # Some archives carry a header row
+        if not str(df.iat[0, 0]).isdigit():
+            df = df.iloc[1:]
+        return normalize_archive(df)
+
+    def download_daily(self, symbol: str, interval: str, month: str) -> Optional[pd.DataFrame]:
+        """Daily archives of a month that has no monthly archive yet"""
+        start_ms, end_ms = month_bounds(month)
+        day = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc)
+        today = datetime.now(timezone.utc).date()
+
+        frames = []
+        while day.timestamp() * 1000 < end_ms and day.date() < today:
+            df = self.download_archive(self.archive_url(symbol, interval, 'daily', day.strftime('%Y-%m-%d')))
+            if df is not None:
+                frames.append(df)
+            day += timedelta(days=1)
+        return pd.concat(frames, ignore_index=True) if frames else None
+
+    def download_rest(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> Optional[pd.DataFrame]:
+        """Page the REST API 1000 bars at a time"""
+        if self.fallback_exchange is None:
+            return None
+
+        frames = []
+        while start_ms < end_ms:
+            df = self.fallback_exchange.get_klines(symbol, interval, limit=1000, start_time=start_ms)
+            df = df[df['timestamp'] < end_ms]
+            if df.empty:
+                break
+            frames.append(df[LAKE_COLUMNS])
+            start_ms = int(df['close_time'].iloc[-1]) + 1
+        return normalize_archive(pd.concat(frames, ignore_index=True).assign(ignore=0)) if frames else None
+
+    def download_month(self, symbol: str, interval: str, month: str) -> str:
+        """Fill one partition; returns written/skipped/missing"""
+        path = self.partition_path(symbol, interval, month)
+        current_month = datetime.now(timezone.utc).strftime('%Y-%m')
+
+        # Older months never change; the last two may have been written before
+        # their archives were complete, so they are refreshed every run
+        if os.path.exists(path) and month < previous_month(current_month):
+            return 'skipped'
+
+        # Monthly archives appear a few days into the next month; use daily ones until then
+        df = self.download_archive(self.archive_url(symbol, interval, 'monthly', month))
+        if df is None and month >= previous_month(current_month):
+            df = self.download_daily(symbol, interval, month)
+
+        # Top up bars that aren't archived yet
+        start_ms, end_ms = month_bounds(month)
+        if df is not None and not df.empty:
+            start_ms = int(df['close_time'].max()) + 1
+        rest = self.download_rest(symbol, interval, start_ms, end_ms)
+        if rest is not None:
+            df = rest if df is None else pd.concat([df, rest], ignore_index=True)
+
+        if df is None or df.empty:
+            return 'missing'
+
+        df = df.drop_duplicates('timestamp').sort_values('timestamp')
+        self.write_partition(df, path)
+        return 'written'
+
+    def write_partition(self, df: pd.DataFrame, path: str):
+        """Write via a temp file so a crash never leaves a half-written partition"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        df[LAKE_COLUMNS].to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def download(self, symbols: List[str], intervals: List[str], start_month: str,
+                 end_month: Optional[str] = None) -> Dict[str, int]:
+        """Download every symbol/interval/month concurrently"""
+        end_month = end_month or datetime.now(timezone.utc).strftime('%Y-%m')
+        tasks = [
+            (symbol, interval, month)
+            for symbol in symbols
+            for interval in intervals
+            for month in month_range(start_month, end_month)
+        ]
+
+        counts = {'written': 0, 'skipped': 0, 'missing': 0, 'failed': 0}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.download_month, *task): task for task in tasks}
+            for future in as_completed(futures):
+                symbol, interval, month = futures[future]
+                try:
+                    status = future.result()
+                except Exception as e:
+                    status = 'failed'
+                    logger.error(f"{symbol} {interval} {month} failed: {e}")
+                counts[status] += 1
+                logger.info(f"{symbol} {interval} {month}: {status}")
+
+        return counts
+
+
+def lake_schema():
+    """Column types written by normalize_archive, plus the month partition key"""
+    import pyarrow as pa
+
+    return pa.schema(
+        [(col, pa.int64() if col in INT_COLUMNS else pa.float64()) for col in LAKE_COLUMNS]
+        + [('month', pa.string())]
+    )
+
+
+def latest_month(root: str, symbol: str, interval: str) -> Optional[str]:
+    """Newest month partition in the lake, None if there is none"""
+    path = os.path.join(root, f"symbol={symbol}", f"interval={interval}")
+    if not os.path.isdir(path):
+        return None
+    months = [name.split('=', 1)[1] for name in os.listdir(path) if name.startswith('month=')]
+    return max(months, default=None)
+
+
+def load_klines(root: str, symbol: str, interval: str, start_time: Optional[int] = None,
+                end_time: Optional[int] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read klines from the lake, memory-mapped, with partition and row-group pruning"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    # Only list this symbol/interval, and give the schema up front so no
+    # partition is opened just to discover it
+    path = os.path.join(root, f"symbol={symbol}", f"interval={interval}")
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns or LAKE_COLUMNS)
+
+    schema = lake_schema()
+    filters = []
+    if start_time is not None:
+        filters.append(('month', '>=', datetime.fromtimestamp(start_time / 1000, tz=timezone.utc).strftime('%Y-%m')))
+        filters.append(('timestamp', '>=', int(start_time)))
+    if end_time is not None:
+        filters.append(('month', '<=', datetime.fromtimestamp(end_time / 1000, tz=timezone.utc).strftime('%Y-%m')))
+        filters.append(('timestamp', '<', int(end_time)))
+
+    partitioning = ds.partitioning(pa.schema([schema.field('month')]), flavor='hive')
+    table = pq.read_table(path, columns=columns, filters=filters or None, schema=schema,
+                          partitioning=partitioning, memory_map=True)
+    df = table.to_pandas()
+    df = df.drop(columns=[col for col in ('symbol', 'interval', 'month') if col in df.columns])
+    if 'timestamp' in df.columns:
+        df = df.sort_values('timestamp')
+    return df.reset_index(drop=True)
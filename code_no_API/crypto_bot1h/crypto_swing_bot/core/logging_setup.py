@@ -0,0 +1,119 @@
+"""
+Logging setup - queued, rotating, structured
+"""
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+# Optional structured fields passed through `extra=`
+EVENT_FIELDS = ('cycle_id', 'symbol', 'stage', 'latency_ms')
+
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        """Render a record as one JSON line"""
+        event = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in EVENT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                event[field] = value
+        if record.exc_info:
+            event['exception'] = self.formatException(record.exc_info)
+        return json.dumps(event, default=str)
+
+
+def gzip_rotator(source: str, dest: str):
+    """Compress a rotated log file"""
+    if not os.path.exists(source):
+        return
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """Rotate when the file exceeds max_bytes or every rotate_seconds"""
+
+    def __init__(self, filename: str, max_bytes: int = 0, backup_count: int = 1,
+                 rotate_seconds: float = 0, compress: bool = True):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=max(backup_count, 1),
+                         encoding='utf-8', delay=True)
+        self.rotate_seconds = rotate_seconds
+        self.next_rotation = time.time() + rotate_seconds if rotate_seconds else None
+        if compress:
+            self.namer = lambda name: name + '.gz'
+            self.rotator = gzip_rotator
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.next_rotation and time.time() >= self.next_rotation:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        if self.rotate_seconds:
+            self.next_rotation = time.time() + self.rotate_seconds
+
+
+def event_fields(cycle_id: Optional[int], stage: str, symbol: Optional[str] = None,
+                 started: Optional[float] = None) -> Dict:
+    """Structured fields for `extra=`; latency is measured from a perf_counter start"""
+    fields = {'cycle_id': cycle_id, 'stage': stage, 'symbol': symbol}
+    if started is not None:
+        fields['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return fields
+
+
+class DeferredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Queue the record as-is so message formatting happens on the listener thread"""
+        return record
+
+
+def setup_logging(log_file: str = 'trading_bot.log', level: str = 'INFO',
+                  module_levels: Optional[Dict[str, str]] = None,
+                  max_bytes: int = 10_000_000, backup_count: int = 10,
+                  rotate_hours: float = 24, json_format: bool = True) -> QueueListener:
+    """Route all logging through a queue to rotating file and console handlers
+
+    Callers only enqueue records; file I/O, formatting and compression run on
+    the listener thread. Stop the returned listener on shutdown to flush it.
+    """
+    file_handler = SizeAndTimeRotatingFileHandler(
+        log_file,
+        max_bytes=max_bytes,
+        backup_count=backup_count,
+        rotate_seconds=rotate_hours * 3600
+    )
+    file_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(CONSOLE_FORMAT))
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    listener.start()
+    return listener
@@ -0,0 +1,281 @@
+"""
+Live order management - market entries with exchange-side OCO brackets
+"""
+import logging
+import threading
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from typing import Callable, Dict, Optional, Tuple
+
+from core.exchanges import ExchangeAdapter
+
+logger = logging.getLogger(__name__)
+
+# Leg statuses that end an order without filling it
+ENDED_UNFILLED = ('CANCELED', 'EXPIRED', 'EXPIRED_IN_MATCH', 'REJECTED')
+
+
+class UnprotectedPosition(Exception):
+    """A position may be open on the exchange without an exit bracket"""
+
+    def __init__(self, symbol: str, quantity: float, entry_price: Optional[float], fee: float, reason: str):
+        super().__init__(reason)
+        self.symbol = symbol
+        self.quantity = quantity
+        self.entry_price = entry_price  # None if the entry's fill is unknown
+        self.fee = fee
+        self.reason = reason
+
+
+def round_to_step(value: float, step: float, rounding=ROUND_DOWN) -> str:
+    """Round to an exchange tick/step size and format for the API"""
+    if not step:
+        return format(Decimal(str(value)).normalize(), 'f')
+    step = Decimal(str(step)).normalize()
+    return format((Decimal(str(value)) / step).to_integral_value(rounding) * step, 'f')
+
+
+class OrderManager:
+    """Places entries plus an OCO stop-loss/take-profit bracket on the exchange
+
+    Exits are enforced by the exchange; fills come back over the user data
+    stream and are passed to on_exit(symbol, reason, price, fee). A bracket
+    that ends without a fill (cancelled, or a stop-limit left resting below
+    a gap) is flattened at market and reported through on_alert(text).
+    """
+
+    def __init__(self, exchange: ExchangeAdapter, on_exit: Callable[[str, str, float, float], None],
+                 stop_limit_buffer: float = 0.002, on_alert: Optional[Callable[[str], None]] = None,
+                 settle_seconds: float = 5.0):
+        self.exchange = exchange
+        self.on_exit = on_exit
+        self.on_alert = on_alert
+        self.stop_limit_buffer = stop_limit_buffer  # Stop-limit price below the trigger
+        self.settle_seconds = settle_seconds        # Wait for a sibling leg's fill before calling a bracket lost
+        self.brackets = {}   # list_id -> {'symbol', 'trade_id', 'quantity'}
+        self.unmatched = {}  # Fills that arrived before their bracket was tracked
+        self.lock = threading.Lock()
+        self.symbol_info = {}
+
+    def start(self):
+        """Load symbol filters and subscribe to order updates"""
+        self.symbol_info = self.exchange.get_exchange_info()
+        self.exchange.start_user_stream(self.handle_event)
+        logger.info("Order manager listening to user data stream")
+
+    def stop(self):
+        self.exchange.stop_user_stream()
+
+    def open_bracket(self, trade_id: str, symbol: str, side: str, quantity: float,
+                     stop_loss: float, risk_reward: float) -> Optional[Dict]:
+        """Market entry followed by an OCO exit bracket
+
+        The take-profit is set risk_reward times the stop distance from the
+        actual fill, so slippage can't put it below market.
+        Returns {'entry_price', 'quantity', 'fee', 'take_profit', 'list_id'} or None
+        if nothing is left open. Call track() once the trade is recorded so its
+        exit can be delivered. Raises UnprotectedPosition if a position may be
+        open without a bracket.
+        """
+        if side != 'LONG':
+            logger.warning(f"Spot account can't open {side} {symbol}, skipping")
+            return None
+
+        info = self.symbol_info.get(symbol, {})
+        step, tick = info.get('step_size', 0), info.get('tick_size', 0)
+
+        try:
+            entry = self.exchange.place_market_order(symbol, 'BUY', round_to_step(quantity, step),
+                                                     client_order_id=f"{trade_id}_in")
+        except Exception as e:
+            self.check_failed_entry(trade_id, symbol, float(round_to_step(quantity, step)), e)
+            raise
+
+        # Fees charged in the base asset reduce what we can sell
+        held = entry['quantity']
+        if entry['commission_asset'] == info.get('base'):
+            held -= entry['commission']
+        fee = self.fee_in_quote(symbol, entry['commission'], entry['commission_asset'], entry['price'])
+        exit_quantity = round_to_step(held, step)
+        take_profit = float(round_to_step(
+            entry['price'] + (entry['price'] - stop_loss) * risk_reward, tick, ROUND_HALF_UP))
+
+        try:
+            bracket = self.exchange.place_oco_order(
+                symbol, 'SELL', exit_quantity,
+                take_profit=round_to_step(take_profit, tick, ROUND_HALF_UP),
+                stop_price=round_to_step(stop_loss, tick, ROUND_HALF_UP),
+                stop_limit_price=round_to_step(stop_loss * (1 - self.stop_limit_buffer), tick, ROUND_HALF_UP),
+                list_client_id=trade_id
+            )
+        except Exception as e:
+            # Never leave an unprotected position
+            logger.error(f"Bracket for {symbol} rejected, flattening: {e}")
+            try:
+                self.exchange.place_market_order(symbol, 'SELL', exit_quantity,
+                                                 client_order_id=f"{trade_id}_out")
+            except Exception as flatten_error:
+                logger.critical(f"Flattening {symbol} failed, position is unprotected: {flatten_error}")
+                raise UnprotectedPosition(
+                    symbol, float(exit_quantity), entry['price'], fee,
+                    f"bracket rejected ({e}) and flatten failed ({flatten_error})"
+                ) from flatten_error
+            return None
+
+        logger.info(f"Bracket placed: {symbol} qty {exit_quantity} SL {stop_loss} TP {take_profit}")
+        return {
+            'entry_price': entry['price'],
+            'quantity': float(exit_quantity),
+            'fee': fee,
+            'take_profit': take_profit,
+            'list_id': bracket['list_id']
+        }
+
+    def check_failed_entry(self, trade_id: str, symbol: str, quantity: float, error: Exception):
+        """Raise UnprotectedPosition if an entry that reported an error may have filled anyway"""
+        try:
+            filled = [
+                o for o in self.exchange.get_order_history(symbol)
+                if o['client_order_id'] == f"{trade_id}_in" and o['quantity'] > 0
+            ]
+        except Exception as lookup_error:
+            logger.critical(f"Entry for {symbol} failed ({error}) and its status is unknown: {lookup_error}")
+            raise UnprotectedPosition(symbol, quantity, None, 0.0,
+                                      f"entry failed ({error}), status unknown") from error
+        if filled:
+            logger.critical(f"Entry for {symbol} failed ({error}) but filled, position is unprotected")
+            raise UnprotectedPosition(symbol, filled[0]['quantity'], filled[0]['price'], 0.0,
+                                      f"entry reported an error but filled ({error})") from error
+
+    def track(self, list_id: int, symbol: str, trade_id: str, quantity: float):
+        """Start delivering exits for a bracket"""
+        with self.lock:
+            self.brackets[list_id] = {'symbol': symbol, 'trade_id': trade_id, 'quantity': quantity}
+            early_event = self.unmatched.pop(list_id, None)
+        if early_event:
+            self.handle_event(early_event)
+
+    def handle_event(self, event: Dict):
+        """User data stream callback"""
+        if event.get('type') != 'order' or event['list_id'] == -1:
+            return
+        status, list_id = event['status'], event['list_id']
+        if status != 'FILLED' and status not in ENDED_UNFILLED:
+            return
+
+        with self.lock:
+            bracket = self.brackets.get(list_id)
+            if bracket is None:
+                # Keep a fill over the sibling leg's expiry
+                if status == 'FILLED' or list_id not in self.unmatched:
+                    self.unmatched[list_id] = event
+                return
+            if status == 'FILLED':
+                self.brackets.pop(list_id)
+
+        if status != 'FILLED':
+            # The other leg expires whenever one fills, so give that fill time to arrive
+            timer = threading.Timer(self.settle_seconds, self.check_bracket, args=(list_id, status))
+            timer.daemon = True
+            timer.start()
+            return
+
+        symbol = bracket['symbol']
+        reason = 'TAKE_PROFIT' if event['client_order_id'].endswith('_tp') else 'STOP_LOSS'
+        fee = self.fee_in_quote(symbol, event['commission'], event['commission_asset'], event['price'])
+        logger.info(f"Bracket filled: {symbol} {reason} at {event['price']}")
+        self.deliver(symbol, reason, event['price'], fee)
+
+    def check_bracket(self, list_id: int, status: str):
+        """Flatten a bracket that ended without an exit fill"""
+        with self.lock:
+            bracket = self.brackets.pop(list_id, None)
+        if bracket is None:
+            return  # Exited normally
+
+        symbol, trade_id = bracket['symbol'], bracket['trade_id']
+        logger.warning(f"Bracket for {symbol} ended without a fill ({status}), flattening")
+        legs = {f"{trade_id}_tp": 'TAKE_PROFIT', f"{trade_id}_sl": 'STOP_LOSS'}
+
+        # A triggered stop-limit resting below a gap still holds the balance
+        for client_order_id in legs:
+            try:
+                self.exchange.cancel_order(symbol, client_order_id)
+            except Exception:
+                pass  # Already done
+
+        try:
+            for order in self.exchange.get_order_history(symbol):
+                if order['client_order_id'] in legs and order['status'] == 'FILLED':
+                    # Filled while we were cancelling; the fill's fee is unknown
+                    self.deliver(symbol, legs[order['client_order_id']], order['price'], 0.0)
+                    return
+
+            info = self.symbol_info.get(symbol, {})
+            sold = self.exchange.place_market_order(symbol, 'SELL',
+                                                    round_to_step(bracket['quantity'], info.get('step_size', 0)),
+                                                    client_order_id=f"{trade_id}_out")
+        except Exception as e:
+            logger.critical(f"Flattening {symbol} failed, position is unprotected: {e}")
+            self.alert(f"🚨 {symbol} bracket {status} and flattening failed ({str(e)[:100]}). "
+                       f"Close the position manually.")
+            return
+
+        self.alert(f"⚠️ {symbol} bracket {status} without a fill, position flattened at {sold['price']}")
+        fee = self.fee_in_quote(symbol, sold['commission'], sold['commission_asset'], sold['price'])
+        self.deliver(symbol, 'BRACKET_LOST', sold['price'], fee)
+
+    def deliver(self, symbol: str, reason: str, price: float, fee: float):
+        try:
+            self.on_exit(symbol, reason, price, fee)
+        except Exception as e:
+            logger.error(f"Exit handling failed for {symbol}: {e}")
+
+    def alert(self, text: str):
+        if self.on_alert:
+            try:
+                self.on_alert(text)
+            except Exception as e:
+                logger.error(f"Alert failed: {e}")
+
+    def fee_in_quote(self, symbol: str, commission: float, asset: Optional[str], price: float) -> float:
+        info = self.symbol_info.get(symbol, {})
+        if asset == info.get('quote'):
+            return commission
+        if asset == info.get('base'):
+            return commission * price
+        return 0.0  # Paid in BNB or similar
+
+    def reconcile(self, open_trades: Dict[str, Tuple[str, int]]) -> Dict[str, Dict]:
+        """Match live trades left OPEN in the store with exchange orders after a restart
+
+        open_trades: {trade_id: (symbol, entry_time_ms)}
+        Returns a state per trade:
+          {'state': 'OPEN', 'list_id'}            bracket still working
+          {'state': 'CLOSED', 'reason', 'price'}  a leg filled while we were down
+          {'state': 'MISSING'}                    no bracket found, position may be unprotected
+          {'state': 'ERROR', 'error'}             the exchange lookup failed
+        """
+        open_lists = {o['list_client_id']: o for o in self.exchange.get_open_oco_orders()}
+        results = {}
+
+        for trade_id, (symbol, entry_time_ms) in open_trades.items():
+            try:
+                if trade_id in open_lists:
+                    results[trade_id] = {'state': 'OPEN', 'list_id': open_lists[trade_id]['list_id']}
+                    continue
+
+                results[trade_id] = {'state': 'MISSING'}
+                legs = {f"{trade_id}_tp": 'TAKE_PROFIT', f"{trade_id}_sl": 'STOP_LOSS'}
+                for order in self.exchange.get_order_history(symbol, start_time=entry_time_ms):
+                    if order['client_order_id'] in legs and order['status'] == 'FILLED':
+                        results[trade_id] = {
+                            'state': 'CLOSED',
+                            'reason': legs[order['client_order_id']],
+                            'price': order['price']
+                        }
+                        break
+            except Exception as e:
+                logger.error(f"Could not reconcile {trade_id}: {e}")
+                results[trade_id] = {'state': 'ERROR', 'error': str(e)}
+
+        return results
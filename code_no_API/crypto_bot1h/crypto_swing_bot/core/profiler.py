@@ -0,0 +1,234 @@
+"""
+Runtime diagnostics - per-cycle flight recorder and on-demand profiling
+"""
+import cProfile
+import json
+import logging
+import os
+import signal
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('balance', 'monitor', 'fetch', 'analyze', 'execute', 'log', 'notify')
+
+
+class FlightRecorder:
+    """Ring buffer of per-stage timings for the last `capacity` cycles
+
+    Cheap enough to leave on: one perf_counter pair per stage. Nested stages
+    count toward both (an exit alert inside 'monitor' is also 'notify'), and
+    stages timed outside a cycle, e.g. exits from the user data stream, are dropped.
+    """
+
+    def __init__(self, capacity: int = 300, dump_dir: str = "data/profiles"):
+        self.records = deque(maxlen=capacity)
+        self.dump_dir = dump_dir
+        self.current = None
+        self.cycle_started = None
+        self.lock = threading.Lock()
+
+    def start_cycle(self, cycle_id: int):
+        with self.lock:
+            self.current = {
+                'cycle_id': cycle_id,
+                'started': datetime.now().isoformat(),
+                'total': None,
+                'stages': dict.fromkeys(STAGES, 0.0)
+            }
+            self.cycle_started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Add the wall time of the block to the current cycle"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float):
+        with self.lock:
+            if self.current is not None:
+                stages = self.current['stages']
+                stages[name] = stages.get(name, 0.0) + seconds
+
+    def end_cycle(self, error: Optional[str] = None) -> Optional[Dict]:
+        """Close the current cycle and keep it in the buffer"""
+        with self.lock:
+            record, self.current = self.current, None
+            if record is None:
+                return None
+            record['total'] = round(time.perf_counter() - self.cycle_started, 4)
+            record['stages'] = {name: round(seconds, 4) for name, seconds in record['stages'].items()}
+            if error:
+                record['error'] = error
+            self.records.append(record)
+            return record
+
+    def snapshot(self) -> List[Dict]:
+        with self.lock:
+            return list(self.records)
+
+    def dump(self, reason: str) -> Optional[str]:
+        """Write the buffer to a JSON file and return its path"""
+        try:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            path = os.path.join(self.dump_dir, f"flight_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{reason}.json")
+            with open(path, 'w') as f:
+                json.dump({'reason': reason, 'cycles': self.snapshot()}, f, indent=1)
+            logger.warning(f"Flight recorder dumped ({reason}): {path}")
+            return path
+        except Exception as e:
+            logger.error(f"Flight recorder dump failed: {e}")
+            return None
+
+
+class CycleProfiler:
+    """cProfile stats and a tracemalloc snapshot for each of the next N cycles
+
+    arm() may be called from a signal handler or another thread, so it only
+    sets a counter; capture starts at the next cycle boundary. cProfile only
+    sees the thread that runs the cycle.
+    """
+
+    def __init__(self, output_dir: str = "data/profiles", top_allocations: int = 25):
+        self.output_dir = output_dir
+        self.top_allocations = top_allocations
+        self.armed_cycles = 0
+        self.profile = None
+        self.started_tracemalloc = False
+
+    def arm(self, cycles: int) -> int:
+        """Profile the next `cycles` cycles; returns how many are now armed"""
+        # No locks or logging: may interrupt the main thread holding either
+        if cycles <= 0:
+            raise ValueError("cycles must be positive")
+        self.armed_cycles = max(self.armed_cycles, cycles)
+        return self.armed_cycles
+
+    def start_cycle(self, cycle_id: int):
+        if self.armed_cycles <= 0:
+            return
+        self.armed_cycles -= 1
+        logger.info(f"Profiling cycle #{cycle_id} ({self.armed_cycles} more armed)")
+
+        try:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracemalloc = True
+            profile = cProfile.Profile()
+            profile.enable()
+            self.profile = profile
+        except Exception as e:
+            # Another profiler may already be attached
+            logger.error(f"Could not start profiling cycle #{cycle_id}: {e}")
+
+    def end_cycle(self, cycle_id: int):
+        if self.profile is None:
+            return
+
+        profile, self.profile = self.profile, None
+        profile.disable()
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            base = os.path.join(self.output_dir, f"cycle_{cycle_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            profile.dump_stats(f"{base}.prof")
+
+            snapshot = tracemalloc.take_snapshot()
+            snapshot.dump(f"{base}.tracemalloc")
+            with open(f"{base}_alloc.txt", 'w') as f:
+                for stat in snapshot.statistics('lineno')[:self.top_allocations]:
+                    f.write(f"{stat}\n")
+
+            logger.info(f"Cycle #{cycle_id} profile written: {base}.prof")
+        except Exception as e:
+            logger.error(f"Failed to write profile for cycle #{cycle_id}: {e}")
+        finally:
+            if self.armed_cycles <= 0 and self.started_tracemalloc:
+                tracemalloc.stop()
+                self.started_tracemalloc = False
+
+
+def install_signal_handler(profiler: CycleProfiler, cycles: int) -> bool:
+    """SIGUSR1 arms the profiler; not available on Windows"""
+    if not hasattr(signal, 'SIGUSR1'):
+        return False
+    if cycles <= 0:
+        logger.warning(f"SIGUSR1 profiling disabled, cycles must be positive (got {cycles})")
+        return False
+    try:
+        signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.arm(cycles))
+    except ValueError:
+        # Only the main thread may install handlers
+        return False
+    logger.info(f"Send SIGUSR1 to pid {os.getpid()} to profile the next {cycles} cycles")
+    return True
+
+
+class ControlServer:
+    """Localhost HTTP endpoint for runtime diagnostics
+
+    POST /profile?cycles=N  arm the profiler
+    GET  /flight            recent flight recorder cycles as JSON
+    POST /flight/dump       write the flight recorder to disk
+    """
+
+    def __init__(self, port: int, profiler: CycleProfiler, recorder: FlightRecorder, default_cycles: int = 3):
+        handler = self.make_handler(profiler, recorder, default_cycles)
+        # Never listen beyond loopback, there is no authentication
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name='control-server', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        logger.info(f"Control endpoint on http://127.0.0.1:{self.server.server_address[1]}")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def make_handler(profiler: CycleProfiler, recorder: FlightRecorder, default_cycles: int):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if urlparse(self.path).path == '/flight':
+                    self.reply(200, recorder.snapshot())
+                else:
+                    self.reply(404, {'error': 'not found'})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                if url.path == '/profile':
+                    try:
+                        armed = profiler.arm(int(parse_qs(url.query).get('cycles', [default_cycles])[0]))
+                    except ValueError:
+                        self.reply(400, {'error': 'cycles must be a positive integer'})
+                        return
+                    logger.info(f"Profiling armed for the next {armed} cycles")
+                    self.reply(200, {'armed_cycles': armed})
+                elif url.path == '/flight/dump':
+                    self.reply(200, {'path': recorder.dump('request')})
+                else:
+                    self.reply(404, {'error': 'not found'})
+
+            def reply(self, status: int, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        return Handler
@@ -3,6 +3,8 @@ Risk management and position sizing
 """
 import logging
 
+logger = logging.getLogger(__name__)
+
 class RiskManager:
     def __init__(self, total_capital: float = 100.0):
         self.total_capital = total_capital
@@ -28,12 +30,12 @@ class RiskManager:
             notional = quantity * entry_price
             if notional < 10:  # Binance minimum
                 quantity = 10 / entry_price
-                logging.warning(f"Position size adjusted to meet minimum: {quantity:.6f}")
+                logger.warning(f"Position size adjusted to meet minimum: {quantity:.6f}")
             
             return round(quantity, 6)
             
         except Exception as e:
-            logging.error(f"Position size calculation failed: {e}")
+            logger.error(f"Position size calculation failed: {e}")
             return 0
     
     def calculate_take_profit(self, entry_price: float, stop_loss_price: float, side: str = "LONG") -> float:
@@ -0,0 +1,277 @@
+"""
+Market scanning - in-process or sharded across worker processes
+"""
+import asyncio
+import logging
+import multiprocessing as mp
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+
+from core.exchanges import ExchangeAdapter, create_exchange, fetch_klines_many
+from core.logging_setup import event_fields
+from core.signal_cache import SignalCache
+from core.strategy import SwingStrategy
+
+logger = logging.getLogger(__name__)
+
+
+def scan_pairs(strategy: SwingStrategy, data_sources: List[ExchangeAdapter], signal_cache: SignalCache,
+               pairs: List[str], cycle_id: Optional[int] = None,
+               timings: Optional[Dict[str, float]] = None) -> Dict[str, Tuple[int, Dict]]:
+    """Fetch and analyze pairs whose latest closed bar hasn't been analyzed yet
+
+    Returns {symbol: (close_time, analysis)} for every bar analyzed, HOLDs included.
+    New HOLDs are cached in memory; saving the cache is left to the caller. Entry
+    signals are left out until the caller acts on them, so one that wasn't
+    executed is analyzed again next cycle.
+    Seconds spent fetching and analyzing are added to `timings` if given.
+    """
+    timings = {} if timings is None else timings
+    results = {}
+    timeframe = strategy.timeframe
+    param_hash = strategy.param_hash()
+
+    # Skip pairs whose latest closed bar was already analyzed
+    expected_close = strategy.last_closed_close_time()
+    pending = [
+        symbol for symbol in pairs
+        if expected_close is None or signal_cache.get(
+            signal_cache.make_key(symbol, timeframe, expected_close, param_hash)) is None
+    ]
+    if not pending:
+        return results
+
+    # Fetch market data concurrently across data venues (+1 bar that is still forming)
+    fetch_started = time.perf_counter()
+    frames = asyncio.run(fetch_klines_many(
+        data_sources, pending, timeframe, limit=strategy.params['min_bars'] + 1
+    ))
+    timings['fetch'] = timings.get('fetch', 0.0) + time.perf_counter() - fetch_started
+
+    for symbol, df in frames.items():
+        started = time.perf_counter()
+        try:
+            if isinstance(df, Exception):
+                raise df
+
+            # Only judge closed bars
+            df = strategy.closed_bars(df)
+            if df.empty:
+                continue
+
+            # The venue may not have published the newest bar yet
+            close_time = int(df['close_time'].iloc[-1])
+            key = signal_cache.make_key(symbol, timeframe, close_time, param_hash)
+            if signal_cache.get(key) is not None:
+                continue
+
+            # Analyze for signals
+            analysis = strategy.analyze(df)
+            if analysis['signal'] == 'HOLD':
+                signal_cache.put(key, analysis, save=False)
+            results[symbol] = (close_time, analysis)
+
+            if analysis['signal'] != 'HOLD':
+                logger.info("Signal found: %s - %s", symbol, analysis['signal'],
+                            extra=event_fields(cycle_id, 'scan', symbol, started))
+            else:
+                logger.debug("No signal: %s - %s", symbol, analysis['reason'],
+                             extra=event_fields(cycle_id, 'scan', symbol, started))
+
+        except Exception as e:
+            logger.error("Error analyzing %s: %s", symbol, e,
+                         extra=event_fields(cycle_id, 'scan', symbol, started))
+        finally:
+            timings['analyze'] = timings.get('analyze', 0.0) + time.perf_counter() - started
+
+    return results
+
+
+def shard_pairs(pairs: List[str], shards: int) -> List[List[str]]:
+    """Split pairs round-robin into at most `shards` non-empty lists"""
+    return [shard for shard in (pairs[i::shards] for i in range(shards)) if shard]
+
+
+def scan_worker(worker_id: int, pairs: List[str], exchange_names: List[str], data_dir: str, lake_dir: str,
+                cache_path: Optional[str], cache_size: int, task_queue, result_queue,
+                log_queue, log_level: str, module_levels: Dict[str, str]):
+    """Worker process: scan its shard each time the coordinator starts a cycle
+
+    Results go back as compact (cycle_id, worker_id, symbol, close_time, analysis)
+    tuples; (cycle_id, worker_id, None, None, timings) marks the shard done.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(log_level)
+    for name, level in module_levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    # Each process owns its venue clients; the cache is only read here,
+    # the coordinator is its single writer
+    data_sources = [create_exchange(name, data_dir=data_dir, lake_dir=lake_dir) for name in exchange_names]
+    strategy = SwingStrategy()
+    signal_cache = SignalCache(cache_path, cache_size)
+
+    while True:
+        cycle_id = task_queue.get()
+        if cycle_id is None:
+            break
+        timings = {}
+        try:
+            results = scan_pairs(strategy, data_sources, signal_cache, pairs, cycle_id, timings)
+            for symbol, (close_time, analysis) in results.items():
+                result_queue.put((cycle_id, worker_id, symbol, close_time, analysis))
+        except Exception as e:
+            logger.error(f"Scan worker {worker_id} failed: {e}")
+        result_queue.put((cycle_id, worker_id, None, None, timings))
+
+
+class ForwardHandler(logging.Handler):
+    def emit(self, record: logging.LogRecord):
+        """Re-emit a worker's record through this process's logging"""
+        logging.getLogger(record.name).handle(record)
+
+
+class ShardedScanner:
+    """Coordinator side of the sharded scan
+
+    Workers only fetch and analyze; risk checks, dedup and execution stay
+    in the coordinator so position and capital limits are global. A worker
+    that dies is respawned, and its shard is scanned in-process for the
+    cycle it was lost in.
+    """
+
+    def __init__(self, pairs: List[str], workers: int, exchange_names: List[str], data_dir: str,
+                 cache_path: Optional[str], cache_size: int, timeout: float = 300,
+                 log_level: str = 'INFO', module_levels: Optional[Dict[str, str]] = None,
+                 lake_dir: str = 'data/lake'):
+        self.timeout = timeout
+        self.shards = shard_pairs(pairs, workers)
+        self.exchange_names = exchange_names
+        self.data_dir = data_dir
+        self.lake_dir = lake_dir
+        self.cache_path = cache_path
+        self.cache_size = cache_size
+        self.log_level = log_level
+        self.module_levels = module_levels or {}
+        self.fallback = None  # (strategy, data_sources, signal_cache), built on first use
+
+        # Spawn so workers don't inherit the parent's logging threads
+        self.ctx = mp.get_context('spawn')
+        self.result_queue = self.ctx.Queue()
+        self.log_queue = self.ctx.Queue()
+        self.log_listener = QueueListener(self.log_queue, ForwardHandler())
+        self.task_queues = [None] * len(self.shards)
+        self.processes = [None] * len(self.shards)
+
+        for worker_id in range(len(self.shards)):
+            self.create_worker(worker_id)
+
+    def create_worker(self, worker_id: int):
+        """Fresh task queue and process for a shard (not started)"""
+        task_queue = self.ctx.Queue()
+        self.task_queues[worker_id] = task_queue
+        self.processes[worker_id] = self.ctx.Process(
+            target=scan_worker,
+            args=(worker_id, self.shards[worker_id], self.exchange_names, self.data_dir, self.lake_dir,
+                  self.cache_path, self.cache_size, task_queue, self.result_queue, self.log_queue,
+                  self.log_level, self.module_levels),
+            name=f"scan-worker-{worker_id}",
+            daemon=True
+        )
+
+    def respawn(self, worker_id: int):
+        process = self.processes[worker_id]
+        logger.error(f"Scan worker {worker_id} died (exit code {process.exitcode}), respawning")
+        process.join(timeout=1)
+        self.create_worker(worker_id)
+        self.processes[worker_id].start()
+
+    def start(self):
+        self.log_listener.start()
+        for process in self.processes:
+            process.start()
+        logger.info(f"Started {len(self.processes)} scan workers")
+
+    def scan(self, cycle_id: int, timings: Optional[Dict[str, float]] = None) -> Dict[str, Tuple[int, Dict]]:
+        """Run one cycle on every shard and collect {symbol: (close_time, analysis)}
+
+        Workers run in parallel, so `timings` gets the slowest shard's time per stage.
+        """
+        timings = {} if timings is None else timings
+
+        # Replace workers that died since the last cycle
+        for worker_id, process in enumerate(self.processes):
+            if not process.is_alive():
+                self.respawn(worker_id)
+
+        for task_queue in self.task_queues:
+            task_queue.put(cycle_id)
+
+        results = {}
+        pending = set(range(len(self.processes)))
+        deadline = time.time() + self.timeout
+
+        while pending:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                logger.warning(f"Scan timed out waiting for workers {sorted(pending)}")
+                break
+            try:
+                # Wake up regularly to notice workers that died mid-cycle
+                message = self.result_queue.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                for worker_id in sorted(pending):
+                    if not self.processes[worker_id].is_alive():
+                        pending.discard(worker_id)
+                        self.respawn(worker_id)
+                        results.update(self.scan_in_process(worker_id, cycle_id, timings))
+                continue
+
+            result_cycle, worker_id, symbol, close_time, analysis = message
+            if result_cycle != cycle_id or worker_id not in pending:
+                continue  # Late result from a timed-out cycle or a lost worker
+            if symbol is None:
+                pending.discard(worker_id)
+                for stage, seconds in (analysis or {}).items():
+                    timings[stage] = max(timings.get(stage, 0.0), seconds)
+                continue
+            results[symbol] = (close_time, analysis)
+
+        return results
+
+    def scan_in_process(self, worker_id: int, cycle_id: int, timings: Dict[str, float]) -> Dict[str, Tuple[int, Dict]]:
+        """Scan a lost worker's shard in the coordinator"""
+        if self.fallback is None:
+            self.fallback = (
+                SwingStrategy(),
+                [create_exchange(name, data_dir=self.data_dir, lake_dir=self.lake_dir)
+                 for name in self.exchange_names],
+                SignalCache(self.cache_path, self.cache_size)
+            )
+        strategy, data_sources, signal_cache = self.fallback
+
+        logger.warning(f"Scanning shard {worker_id} in-process for cycle #{cycle_id}")
+        shard_timings = {}
+        try:
+            results = scan_pairs(strategy, data_sources, signal_cache, self.shards[worker_id],
+                                 cycle_id, shard_timings)
+        except Exception as e:
+            logger.error(f"In-process scan of shard {worker_id} failed: {e}")
+            results = {}
+        for stage, seconds in shard_timings.items():
+            timings[stage] = max(timings.get(stage, 0.0), seconds)
+        return results
+
+    def stop(self):
+        for task_queue in self.task_queues:
+            task_queue.put(None)
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.log_listener.stop()
@@ -0,0 +1,84 @@
+"""
+Signal cache - one analysis per closed candle
+"""
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SignalCache:
+    """LRU of analyses keyed on (symbol, timeframe, close_time, param hash)
+
+    Persisted to a JSON file so a restarted bot, or another bot sharing the
+    file, never acts twice on the same closed bar.
+    """
+
+    def __init__(self, path: Optional[str] = "data/signal_cache.json", max_entries: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.loaded_mtime = None
+        self.refresh()
+
+    @staticmethod
+    def make_key(symbol: str, timeframe: str, close_time: int, param_hash: str) -> str:
+        return f"{symbol}|{timeframe}|{int(close_time)}|{param_hash}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached analysis, or None if this bar hasn't been analyzed"""
+        if key not in self.entries:
+            self.refresh()
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key: str, analysis: Dict, save: bool = True):
+        self.entries[key] = analysis
+        self.entries.move_to_end(key)
+        self.evict()
+        if save:
+            self.save()
+
+    def evict(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def refresh(self):
+        """Merge in entries another process wrote since we last read the file"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self.loaded_mtime:
+                return
+            with open(self.path) as f:
+                stored = json.load(f)
+            for key, analysis in reversed(stored):
+                if key not in self.entries:
+                    # Entries from disk count as least recently used
+                    self.entries[key] = analysis
+                    self.entries.move_to_end(key, last=False)
+            self.evict()
+            self.loaded_mtime = mtime
+        except Exception as e:
+            logger.warning(f"Signal cache unreadable, starting fresh: {e}")
+
+    def save(self):
+        """Write atomically so readers never see a partial file"""
+        if not self.path:
+            return
+        try:
+            self.refresh()
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(list(self.entries.items()), f, default=float)
+            os.replace(tmp_path, self.path)
+            self.loaded_mtime = os.stat(self.path).st_mtime_ns
+        except Exception as e:
+            logger.error(f"Failed to save signal cache: {e}")
@@ -1,24 +1,68 @@
 """
 Trading strategy logic - 4-hour swing trading
 """
+import hashlib
+import json
+import time
 import pandas as pd
 import talib
 from typing import Dict, Optional
 
+INTERVAL_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000}
+
+
+def interval_to_ms(interval: str) -> Optional[int]:
+    """Length of an epoch-aligned kline interval ("1m", "4h", "1d"), None otherwise"""
+    unit = INTERVAL_MS.get(interval[-1:])
+    if unit is None or not interval[:-1].isdigit():
+        return None
+    return int(interval[:-1]) * unit
+
+
 class SwingStrategy:
     def __init__(self):
         self.timeframe = "4h"
         self.pairs = ["BTCUSDT", "ETHUSDT"]
         
+        # Anything that changes signals must live here so cached signals are invalidated
+        self.params = {
+            'min_bars': 100,
+            'ema_fast': 20,
+            'ema_slow': 50,
+            'rsi_period': 14,
+            'rsi_oversold': 35,
+            'rsi_overbought': 65,
+            'lookback': 20
+        }
+    
+    def param_hash(self) -> str:
+        """Short fingerprint of timeframe and parameters"""
+        payload = json.dumps({'timeframe': self.timeframe, **self.params}, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:12]
+    
+    def last_closed_close_time(self, now_ms: Optional[int] = None) -> Optional[int]:
+        """close_time of the most recent closed bar, None if it can't be derived from the clock"""
+        interval_ms = interval_to_ms(self.timeframe)
+        if interval_ms is None:
+            return None
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        return (now_ms // interval_ms) * interval_ms - 1
+    
+    def closed_bars(self, df: pd.DataFrame, now_ms: Optional[int] = None) -> pd.DataFrame:
+        """Drop the still-forming last candle"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        return df[df['close_time'] < now_ms].reset_index(drop=True)
+        
     def analyze(self, df: pd.DataFrame) -> Dict:
-        """Analyze 4h chart for swing trade setups"""
-        if len(df) < 100:
+        """Analyze closed 4h bars for swing trade setups"""
+        p = self.params
+        if len(df) < p['min_bars']:
             return {"signal": "HOLD", "reason": "Insufficient data"}
         
         # Calculate indicators
-        df['EMA_20'] = talib.EMA(df['close'], timeperiod=20)
-        df['EMA_50'] = talib.EMA(df['close'], timeperiod=50)
-        df['RSI'] = talib.RSI(df['close'], timeperiod=14)
+        df['EMA_fast'] = talib.EMA(df['close'], timeperiod=p['ema_fast'])
+        df['EMA_slow'] = talib.EMA(df['close'], timeperiod=p['ema_slow'])
+        df['RSI'] = talib.RSI(df['close'], timeperiod=p['rsi_period'])
         
         # Get latest values
         current_close = df['close'].iloc[-1]
@@ -26,15 +70,15 @@ class SwingStrategy:
         prev_rsi = df['RSI'].iloc[-2]
         
         # 1. Trend Filter
-        is_uptrend = df['EMA_20'].iloc[-1] > df['EMA_50'].iloc[-1]
+        is_uptrend = df['EMA_fast'].iloc[-1] > df['EMA_slow'].iloc[-1]
         
         # 2. Support/Resistance Levels
-        recent_low = df['low'].iloc[-20:].min()
-        recent_high = df['high'].iloc[-20:].max()
+        recent_low = df['low'].iloc[-p['lookback']:].min()
+        recent_high = df['high'].iloc[-p['lookback']:].max()
         
         # 3. RSI Conditions
-        is_oversold = current_rsi < 35 and prev_rsi < current_rsi
-        is_overbought = current_rsi > 65 and prev_rsi > current_rsi
+        is_oversold = current_rsi < p['rsi_oversold'] and prev_rsi < current_rsi
+        is_overbought = current_rsi > p['rsi_overbought'] and prev_rsi > current_rsi
         
         # 4. Generate Signals
         if is_uptrend and is_oversold and current_close <= recent_low * 1.02:
@@ -58,22 +102,7 @@ class SwingStrategy:
         
         return {"signal": "HOLD", "reason": "No quality setup found"}
     
-    def fetch_klines(self, client, symbol: str, limit: int = 100) -> pd.DataFrame:
-        """Fetch kline data from Binance"""
-        klines = client.get_klines(
-            symbol=symbol,
-            interval=self.timeframe,
-            limit=limit
-        )
-        
-        df = pd.DataFrame(klines, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_asset_volume', 'number_of_trades',
-            'taker_buy_base', 'taker_buy_quote', 'ignore'
-        ])
-        
-        # Convert to numeric
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = pd.to_numeric(df[col])
-        
-        return df
\ No newline at end of file
+    def fetch_klines(self, exchange, symbol: str, limit: int = 100,
+                     interval: Optional[str] = None, start_time: Optional[int] = None) -> pd.DataFrame:
+        """Fetch kline data from an exchange adapter"""
+        return exchange.get_klines(symbol, interval or self.timeframe, limit=limit, start_time=start_time)
\ No newline at end of file
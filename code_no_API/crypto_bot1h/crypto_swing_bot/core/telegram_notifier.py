@@ -6,6 +6,8 @@ from datetime import datetime
 import logging
 from typing import Dict
 
+logger = logging.getLogger(__name__)
+
 class TelegramNotifier:
     def __init__(self, bot_token: str, chat_id: str):
         self.bot_token = bot_token
@@ -26,7 +28,7 @@ class TelegramNotifier:
             response.raise_for_status()
             return True
         except Exception as e:
-            logging.error(f"Failed to send Telegram message: {e}")
+            logger.error(f"Failed to send Telegram message: {e}")
             return False
     
     def send_trade_alert(self, trade_data: Dict):
@@ -1,45 +1,67 @@
 """
-Excel trade logging system
+Trade logging system - SQLite store with a background Excel report
 """
 import pandas as pd
 import os
+import sqlite3
 from datetime import datetime
 import logging
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
+from typing import Optional
+
+from core.excel_report import ExcelReportWriter, TRADE_COLUMNS
+
+logger = logging.getLogger(__name__)
 
 class TradeLogger:
-    def __init__(self, excel_path: str = "data/trade_history.xlsx"):
+    def __init__(self, excel_path: str = "data/trade_history.xlsx",
+                 db_path: Optional[str] = None, report_interval: float = 60):
         self.excel_path = excel_path
+        self.db_path = db_path or os.path.splitext(excel_path)[0] + ".db"
         self.ensure_data_directory()
-        self.initialize_excel_file()
-    
+        self.initialize_store()
+
+        # Excel file is a report regenerated off the trading thread
+        self.report_writer = ExcelReportWriter(self.db_path, self.excel_path, report_interval)
+        self.report_writer.start()
+        self.report_writer.request()
+
     def ensure_data_directory(self):
         """Create data directory if it doesn't exist"""
         os.makedirs(os.path.dirname(self.excel_path), exist_ok=True)
-    
-    def initialize_excel_file(self):
-        """Create or load Excel file"""
-        columns = [
-            'Trade_ID', 'Symbol', 'Side', 'Status',
-            'Entry_Price', 'Exit_Price', 'Quantity',
-            'Entry_Time', 'Exit_Time', 'Duration',
-            'Stop_Loss', 'Take_Profit',
-            'PnL_USD', 'PnL_Percent', 'Risk_Reward',
-            'Trade_Reason', 'Strategy_Used',
-            'Confidence', 'Notes'
-        ]
-        
-        if not os.path.exists(self.excel_path):
-            df = pd.DataFrame(columns=columns)
-            df.to_excel(self.excel_path, index=False, sheet_name='Trades')
-            logging.info(f"Created trade log: {self.excel_path}")
-    
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def initialize_store(self):
+        """Create the trade store, importing an existing Excel log once"""
+        conn = self.connect()
+        try:
+            # WAL lets the report thread read while trades are written
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS trades ({', '.join(TRADE_COLUMNS)})")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_id ON trades (Trade_ID)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_symbol ON trades (Symbol)")
+
+            is_empty = conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0] == 0
+            if is_empty and os.path.exists(self.excel_path):
+                df = pd.read_excel(self.excel_path)
+                df = df[[col for col in TRADE_COLUMNS if col in df.columns]]
+                for col in ['Entry_Time', 'Exit_Time']:
+                    if col in df.columns:
+                        df[col] = df[col].astype(str).where(df[col].notna(), None)
+                df.to_sql('trades', conn, if_exists='append', index=False)
+                logger.info(f"Imported {len(df)} trades from {self.excel_path}")
+
+            conn.commit()
+            logger.info(f"Trade store ready: {self.db_path}")
+        finally:
+            conn.close()
+
     def log_trade_entry(self, trade_data: dict) -> str:
         """Log when a trade is opened"""
         try:
-            trade_id = f"{trade_data['symbol']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            
+            trade_id = trade_data.get('trade_id') or f"{trade_data['symbol']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
             log_entry = {
                 'Trade_ID': trade_id,
                 'Symbol': trade_data['symbol'],
@@ -48,7 +70,7 @@ class TradeLogger:
                 'Entry_Price': trade_data['entry_price'],
                 'Exit_Price': None,
                 'Quantity': trade_data['quantity'],
-                'Entry_Time': datetime.now(),
+                'Entry_Time': datetime.now().isoformat(),
                 'Exit_Time': None,
                 'Duration': None,
                 'Stop_Loss': trade_data['stop_loss'],
@@ -61,54 +83,90 @@ class TradeLogger:
                 'Confidence': trade_data.get('confidence', 'MEDIUM'),
                 'Notes': trade_data.get('notes', '')
             }
-            
-            df = pd.read_excel(self.excel_path) if os.path.exists(self.excel_path) else pd.DataFrame()
-            df = pd.concat([df, pd.DataFrame([log_entry])], ignore_index=True)
-            df.to_excel(self.excel_path, index=False)
-            
-            logging.info(f"Logged trade entry: {trade_id}")
+
+            conn = self.connect()
+            try:
+                conn.execute(
+                    f"INSERT INTO trades ({', '.join(log_entry)}) VALUES ({', '.join('?' * len(log_entry))})",
+                    [float(v) if hasattr(v, 'dtype') else v for v in log_entry.values()]
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+            self.report_writer.request()
+            logger.info(f"Logged trade entry: {trade_id}")
             return trade_id
-            
+
         except Exception as e:
-            logging.error(f"Failed to log trade entry: {e}")
+            logger.error(f"Failed to log trade entry: {e}")
             return None
-    
+
     def log_trade_exit(self, trade_id: str, exit_data: dict) -> bool:
         """Log when a trade is closed"""
         try:
-            df = pd.read_excel(self.excel_path)
-            trade_idx = df[df['Trade_ID'] == trade_id].index
-            
-            if len(trade_idx) == 0:
-                return False
-            
-            idx = trade_idx[0]
-            entry_price = df.at[idx, 'Entry_Price']
-            exit_price = exit_data['exit_price']
-            quantity = df.at[idx, 'Quantity']
-            side = df.at[idx, 'Side']
-            
-            # Calculate P&L
-            if side == 'LONG':
-                pnl_usd = (exit_price - entry_price) * quantity
-            else:
-                pnl_usd = (entry_price - exit_price) * quantity
-            
-            pnl_percent = (pnl_usd / (entry_price * quantity)) * 100
-            
-            # Update record
-            df.at[idx, 'Status'] = 'CLOSED'
-            df.at[idx, 'Exit_Price'] = exit_price
-            df.at[idx, 'Exit_Time'] = datetime.now()
-            df.at[idx, 'Duration'] = str(datetime.now() - pd.to_datetime(df.at[idx, 'Entry_Time']))
-            df.at[idx, 'PnL_USD'] = round(pnl_usd, 2)
-            df.at[idx, 'PnL_Percent'] = round(pnl_percent, 2)
-            df.at[idx, 'Notes'] = exit_data.get('notes', '')
-            
-            df.to_excel(self.excel_path, index=False)
-            logging.info(f"Logged trade exit: {trade_id}, P&L: ${pnl_usd:.2f}")
+            conn = self.connect()
+            try:
+                row = conn.execute(
+                    "SELECT rowid, Entry_Price, Quantity, Side, Entry_Time FROM trades "
+                    "WHERE Trade_ID = ? ORDER BY rowid LIMIT 1",
+                    (trade_id,)
+                ).fetchone()
+
+                if row is None:
+                    return False
+
+                rowid, entry_price, quantity, side, entry_time = row
+                exit_price = float(exit_data['exit_price'])
+                fees = exit_data.get('fees', 0.0)
+
+                # Calculate P&L net of fees
+                if side == 'LONG':
+                    pnl_usd = (exit_price - entry_price) * quantity - fees
+                else:
+                    pnl_usd = (entry_price - exit_price) * quantity - fees
+
+                pnl_percent = (pnl_usd / (entry_price * quantity)) * 100
+
+                # Update record
+                exit_time = datetime.now()
+                conn.execute(
+                    "UPDATE trades SET Status = 'CLOSED', Exit_Price = ?, Exit_Time = ?, Duration = ?, "
+                    "PnL_USD = ?, PnL_Percent = ?, Notes = ? WHERE rowid = ?",
+                    (
+                        exit_price,
+                        exit_time.isoformat(),
+                        str(exit_time - pd.to_datetime(entry_time)),
+                        round(pnl_usd, 2),
+                        round(pnl_percent, 2),
+                        exit_data.get('notes', ''),
+                        rowid
+                    )
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+            self.report_writer.request()
+            logger.info(f"Logged trade exit: {trade_id}, P&L: ${pnl_usd:.2f}")
             return True
-            
+
         except Exception as e:
-            logging.error(f"Failed to log trade exit: {e}")
-            return False
\ No newline at end of file
+            logger.error(f"Failed to log trade exit: {e}")
+            return False
+
+    def get_open_trades(self) -> pd.DataFrame:
+        """Trades still OPEN in the store"""
+        conn = self.connect()
+        try:
+            return pd.read_sql_query(
+                "SELECT Trade_ID, Symbol, Side, Entry_Price, Quantity, Stop_Loss, Take_Profit, Entry_Time, Notes "
+                "FROM trades WHERE Status = 'OPEN' ORDER BY rowid",
+                conn
+            )
+        finally:
+            conn.close()
+
+    def close(self):
+        """Flush the final Excel report"""
+        self.report_writer.stop()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Bulk historical kline downloader
+"""
+import sys
+import os
+import argparse
+import logging
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.kline_downloader import KlineDownloader, ARCHIVE_URL, DEFAULT_LAKE_DIR
+
+
+def parse_args():
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="Download Binance klines into the Parquet lake")
+    parser.add_argument('--symbols', nargs='+', default=["BTCUSDT", "ETHUSDT"])
+    parser.add_argument('--intervals', nargs='+', default=["1h", "4h"])
+    parser.add_argument('--start', required=True, help="First month, YYYY-MM")
+    parser.add_argument('--end', help="Last month, YYYY-MM (default: current month)")
+    parser.add_argument('--root', default=DEFAULT_LAKE_DIR, help="Lake directory")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent downloads")
+    parser.add_argument('--base-url', default=ARCHIVE_URL, help="Archive mirror")
+    parser.add_argument('--rest-exchange', choices=['binance_us', 'binance_com'],
+                        help="Page this venue's REST API for bars not archived yet")
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    fallback = None
+    if args.rest_exchange:
+        from core.exchanges import create_exchange
+        fallback = create_exchange(args.rest_exchange)
+
+    downloader = KlineDownloader(
+        root=args.root,
+        base_url=args.base_url,
+        workers=args.workers,
+        fallback_exchange=fallback
+    )
+    counts = downloader.download(args.symbols, args.intervals, args.start, args.end)
+
+    print("\n" + "="*60)
+    print(f"Written: {counts['written']}  Skipped: {counts['skipped']}  "
+          f"Missing: {counts['missing']}  Failed: {counts['failed']}")
+    print("="*60)
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
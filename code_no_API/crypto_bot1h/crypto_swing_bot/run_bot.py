@@ -16,25 +16,33 @@ def signal_handler(signum, frame):
 
 def print_banner():
     """Print startup banner"""
-    from config.keys import STARTING_CAPITAL, RISK_PER_TRADE
+    from config.keys import STARTING_CAPITAL, RISK_PER_TRADE, LIVE_TRADING
+    
+    if LIVE_TRADING:
+        title = "LIVE MODE (Real Orders)  "
+        mode = "LIVE (market entries + exchange OCO exits)"
+        warnings = "• Bot is running in LIVE TRADING mode\n    • Real orders are placed with your API keys"
+    else:
+        title = "SAFE MODE (Paper Trading)"
+        mode = "SAFE MODE (No real trades)"
+        warnings = "• Bot is running in PAPER TRADING mode\n    • No real orders will be placed"
     
     banner = f"""
     {'🚀'*20}
     ╔═══════════════════════════════════════════════════╗
     ║        CRYPTO SWING TRADING BOT - $100 Edition    ║
-    ║             SAFE MODE (Paper Trading)             ║
+    ║             {title}             ║
     ╚═══════════════════════════════════════════════════╝
     {'💰'*20}
     
     📊 Configuration:
-    • Mode: SAFE MODE (No real trades)
+    • Mode: {mode}
     • Capital: ${STARTING_CAPITAL}
     • Risk/Trade: {RISK_PER_TRADE*100}%
     • Max Positions: 1
     
     ⚠️  Warnings:
-    • Bot is running in PAPER TRADING mode
-    • No real orders will be placed
+    {warnings}
     • Check trading_bot.log for details
     
     📱 Controls:
@@ -56,7 +64,8 @@ def main():
     
     # Start the bot
     print("\n" + "="*60)
-    print("Starting trading bot in SAFE MODE...")
+    from config.keys import LIVE_TRADING
+    print(f"Starting trading bot in {'LIVE' if LIVE_TRADING else 'SAFE'} MODE...")
     print("="*60)
     
     try:
@@ -0,0 +1,8 @@
+"""
+Shared test setup
+"""
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
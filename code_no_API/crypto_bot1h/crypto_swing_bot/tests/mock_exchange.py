@@ -0,0 +1,171 @@
+"""
+In-memory spot exchange with OCO semantics for exercising OrderManager
+"""
+import itertools
+import time
+from typing import Callable, Dict, List, Optional
+
+from core.exchanges import ExchangeAdapter
+
+
+class MockOCOExchange(ExchangeAdapter):
+    """Spot venue that fills market orders instantly and works OCO brackets
+
+    Market orders fill at the current price; buys pay the fee in the base
+    asset, sells in the quote asset. set_price() moves the market: a SELL
+    bracket fills its take-profit at the limit price once the price reaches
+    it and expires the stop leg. Once the stop triggers the take-profit
+    expires and the stop-limit leg works as a limit order, filling at its
+    limit price only while the market is at or above it, so a gap leaves it
+    resting. Order updates are pushed to the user stream callback only while
+    it is connected, so stop_user_stream() simulates the bot being down.
+    """
+    name = 'mock'
+
+    def __init__(self, prices: Dict[str, float], fee_rate: float = 0.001, quote: str = 'USDT',
+                 tick_size: float = 0.01, step_size: float = 0.00001):
+        self.prices = dict(prices)
+        self.fee_rate = fee_rate
+        self.quote = quote
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.orders = []       # Every order ever placed, oldest first
+        self.order_lists = {}  # list_id -> {'symbol', 'list_client_id', 'legs', 'status'}
+        self.callback = None
+        self.ids = itertools.count(1)
+
+    def get_ticker(self, symbol: str) -> float:
+        return self.prices[symbol]
+
+    def get_exchange_info(self) -> Dict[str, Dict]:
+        return {
+            symbol: {'base': symbol[:-len(self.quote)], 'quote': self.quote,
+                     'tick_size': self.tick_size, 'step_size': self.step_size, 'min_notional': 0.0}
+            for symbol in self.prices
+        }
+
+    def place_market_order(self, symbol: str, side: str, quantity: str,
+                           client_order_id: Optional[str] = None) -> Dict:
+        order = self.new_order(symbol, side, 'MARKET', float(quantity), client_order_id)
+        self.fill(order, self.prices[symbol])
+        return {
+            'order_id': order['order_id'],
+            'price': order['price'],
+            'quantity': order['quantity'],
+            'commission': order['commission'],
+            'commission_asset': order['commission_asset']
+        }
+
+    def place_oco_order(self, symbol: str, side: str, quantity: str, take_profit: str,
+                        stop_price: str, stop_limit_price: str, list_client_id: str) -> Dict:
+        price = self.prices[symbol]
+        take_profit, stop_price, stop_limit_price = float(take_profit), float(stop_price), float(stop_limit_price)
+        if side != 'SELL':
+            raise ValueError("Mock only supports SELL brackets")
+        if not take_profit > price > stop_price or stop_limit_price > stop_price:
+            raise ValueError("The relationship of the prices for the orders is not correct.")
+
+        list_id = next(self.ids)
+        tp = self.new_order(symbol, side, 'LIMIT_MAKER', float(quantity), f"{list_client_id}_tp", list_id)
+        tp['limit_price'] = take_profit
+        sl = self.new_order(symbol, side, 'STOP_LOSS_LIMIT', float(quantity), f"{list_client_id}_sl", list_id)
+        sl['stop_price'], sl['limit_price'] = stop_price, stop_limit_price
+        self.order_lists[list_id] = {
+            'symbol': symbol, 'list_client_id': list_client_id, 'legs': (tp, sl), 'status': 'EXECUTING'
+        }
+        return {'list_id': list_id}
+
+    def set_price(self, symbol: str, price: float):
+        """Move the market and work any brackets it reaches"""
+        self.prices[symbol] = price
+        for order_list in self.order_lists.values():
+            if order_list['symbol'] != symbol:
+                continue
+            tp, sl = order_list['legs']
+            if order_list['status'] == 'EXECUTING':
+                if price >= tp['limit_price']:
+                    order_list['status'] = 'ALL_DONE'
+                    self.fill(tp, tp['limit_price'])
+                    self.expire(sl, 'EXPIRED')
+                    continue
+                if price <= sl['stop_price']:
+                    # Triggered: the take-profit goes, the stop-limit leg joins the book
+                    order_list['status'] = 'ALL_DONE'
+                    sl['triggered'] = True
+                    self.expire(tp, 'EXPIRED')
+            if sl.get('triggered') and sl['status'] == 'NEW' and price >= sl['limit_price']:
+                self.fill(sl, sl['limit_price'])
+
+    def cancel_order(self, symbol: str, client_order_id: str):
+        for order in self.orders:
+            if order['client_order_id'] == client_order_id and order['status'] == 'NEW':
+                break
+        else:
+            raise ValueError("Unknown order sent.")
+
+        order_list = self.order_lists.get(order['list_id'])
+        for leg in order_list['legs'] if order_list else (order,):
+            if leg['status'] == 'NEW':
+                self.expire(leg, 'CANCELED')
+        if order_list:
+            order_list['status'] = 'ALL_DONE'
+
+    def get_open_oco_orders(self) -> List[Dict]:
+        return [
+            {'list_id': list_id, 'symbol': o['symbol'], 'list_client_id': o['list_client_id']}
+            for list_id, o in self.order_lists.items() if o['status'] == 'EXECUTING'
+        ]
+
+    def get_order_history(self, symbol: str, start_time: Optional[int] = None) -> List[Dict]:
+        return [
+            {key: order[key] for key in ('order_id', 'client_order_id', 'list_id', 'type',
+                                         'status', 'price', 'quantity')}
+            for order in self.orders
+            if order['symbol'] == symbol and (start_time is None or order['time'] >= start_time)
+        ]
+
+    def start_user_stream(self, callback: Callable[[Dict], None]):
+        self.callback = callback
+
+    def stop_user_stream(self):
+        self.callback = None
+
+    def new_order(self, symbol: str, side: str, order_type: str, quantity: float,
+                  client_order_id: Optional[str], list_id: int = -1) -> Dict:
+        order = {
+            'order_id': next(self.ids), 'client_order_id': client_order_id or '', 'list_id': list_id,
+            'symbol': symbol, 'side': side, 'type': order_type, 'status': 'NEW',
+            'price': 0.0, 'quantity': quantity, 'commission': 0.0, 'commission_asset': None,
+            'time': int(time.time() * 1000)
+        }
+        self.orders.append(order)
+        return order
+
+    def fill(self, order: Dict, price: float):
+        order['status'], order['price'] = 'FILLED', price
+        if order['side'] == 'BUY':
+            order['commission'], order['commission_asset'] = order['quantity'] * self.fee_rate, order['symbol'][:-len(self.quote)]
+        else:
+            order['commission'], order['commission_asset'] = order['quantity'] * price * self.fee_rate, self.quote
+        self.emit(order)
+
+    def expire(self, order: Dict, status: str):
+        order['status'] = status
+        self.emit(order)
+
+    def emit(self, order: Dict):
+        if self.callback:
+            self.callback({
+                'type': 'order',
+                'symbol': order['symbol'],
+                'order_id': order['order_id'],
+                'client_order_id': order['client_order_id'],
+                'list_id': order['list_id'],
+                'order_type': order['type'],
+                'side': order['side'],
+                'status': order['status'],
+                'price': order['price'],
+                'quantity': order['quantity'] if order['status'] == 'FILLED' else 0.0,
+                'commission': order['commission'],
+                'commission_asset': order['commission_asset']
+            })
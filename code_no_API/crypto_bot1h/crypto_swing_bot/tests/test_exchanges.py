@@ -0,0 +1,121 @@
+"""
+Exchange adapters and multi-venue fetch helpers
+"""
+import asyncio
+
+import pandas as pd
+import pytest
+
+from core.exchanges import (
+    KLINE_COLUMNS, ExchangeAdapter, create_exchange, fetch_klines_many, venue_order
+)
+from core.kline_downloader import INT_COLUMNS, LAKE_COLUMNS, KlineDownloader, month_bounds
+
+HOUR_MS = 3_600_000
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    opens = [1_700_000_000_000 + i * 60_000 for i in range(5)]
+    pd.DataFrame({
+        'timestamp': opens, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': [10.0, 11.0, 12.0, 13.0, 14.0],
+        'volume': 1.0, 'close_time': [t + 59_999 for t in opens]
+    }).reindex(columns=KLINE_COLUMNS, fill_value=0).to_csv(tmp_path / 'BTCUSDT_1m.csv', index=False)
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize('name', ['csv', 'parquet'])
+def test_offline_venues_report_paper_balance(name, tmp_path):
+    exchange = create_exchange(name, data_dir=str(tmp_path), lake_dir=str(tmp_path), paper_balance=40.0)
+    assert exchange.get_balance('USDT') == 40.0
+    assert exchange.get_balance('BTC') == 0.0
+
+
+@pytest.fixture
+def lake(tmp_path):
+    """Hourly bars for Jan-Mar 2023, 10 per month"""
+    downloader = KlineDownloader(root=str(tmp_path / 'lake'))
+    for month in ['2023-01', '2023-02', '2023-03']:
+        start_ms, _ = month_bounds(month)
+        df = pd.DataFrame({col: [0.0] * 10 for col in LAKE_COLUMNS})
+        df['timestamp'] = [start_ms + i * HOUR_MS for i in range(10)]
+        df['close_time'] = df['timestamp'] + HOUR_MS - 1
+        df['close'] = [float(i) for i in range(10)]
+        df[INT_COLUMNS] = df[INT_COLUMNS].astype('int64')
+        downloader.write_partition(df, downloader.partition_path('BTCUSDT', '1h', month))
+    return downloader
+
+
+def test_parquet_tail_reads_only_latest_months(lake):
+    # Months the tail can't reach are never opened
+    with open(lake.partition_path('BTCUSDT', '1h', '2023-01'), 'wb') as f:
+        f.write(b'not parquet')
+    exchange = create_exchange('parquet', lake_dir=lake.root)
+
+    df = exchange.get_klines('BTCUSDT', '1h', limit=3)
+
+    mar_start, _ = month_bounds('2023-03')
+    assert list(df.columns) == KLINE_COLUMNS
+    assert df['timestamp'].tolist() == [mar_start + i * HOUR_MS for i in (7, 8, 9)]
+    assert exchange.get_klines('BTCUSDT', '1h', limit=1)['close'].tolist() == [9.0]
+
+
+def test_parquet_tail_falls_back_across_gaps(lake):
+    exchange = create_exchange('parquet', lake_dir=lake.root)
+
+    # Only 10 bars a month, so 15 bars span the gap back into February
+    df = exchange.get_klines('BTCUSDT', '1h', limit=15)
+    assert len(df) == 15
+    assert df['timestamp'].iloc[0] == month_bounds('2023-02')[0] + 5 * HOUR_MS
+
+    assert len(exchange.get_klines('BTCUSDT', '1h', limit=100)) == 30
+    assert exchange.get_klines('ETHUSDT', '1h', limit=5).empty
+
+
+def test_csv_ticker_is_last_close(csv_dir):
+    exchange = create_exchange('csv', data_dir=csv_dir)
+    assert exchange.get_ticker('BTCUSDT') == 14.0
+    assert list(exchange.get_exchange_info()) == ['BTCUSDT']
+
+
+class FakeVenue(ExchangeAdapter):
+    def __init__(self, name, down=()):
+        self.name = name
+        self.down = set(down)
+        self.calls = []
+
+    def get_klines(self, symbol, interval, limit=100, start_time=None):
+        self.calls.append(symbol)
+        if symbol in self.down:
+            raise ConnectionError(f"{self.name} unavailable")
+        return pd.DataFrame({'venue': [self.name]})
+
+
+def test_symbols_stick_to_one_venue():
+    venues = [FakeVenue('a'), FakeVenue('b'), FakeVenue('c')]
+    symbols = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'BNBUSDT', 'XRPUSDT']
+
+    first = asyncio.run(fetch_klines_many(venues, symbols, '4h'))
+    # A different pending list must not move any symbol
+    second = asyncio.run(fetch_klines_many(venues, symbols[2:], '4h'))
+
+    for symbol in symbols[2:]:
+        assert second[symbol]['venue'][0] == first[symbol]['venue'][0]
+    assert {df['venue'][0] for df in first.values()} != {'a'}  # Load is spread
+
+
+def test_failed_venue_falls_back():
+    primary = venue_order('BTCUSDT', 2)[0]
+    venues = [FakeVenue('a'), FakeVenue('b')]
+    venues[primary].down.add('BTCUSDT')
+
+    result = asyncio.run(fetch_klines_many(venues, ['BTCUSDT'], '4h'))['BTCUSDT']
+
+    assert result['venue'][0] == venues[1 - primary].name
+    assert venues[primary].calls == ['BTCUSDT']
+
+
+def test_all_venues_failing_returns_error():
+    venues = [FakeVenue('a', down={'BTCUSDT'}), FakeVenue('b', down={'BTCUSDT'})]
+    result = asyncio.run(fetch_klines_many(venues, ['BTCUSDT'], '4h'))['BTCUSDT']
+    assert isinstance(result, ConnectionError)
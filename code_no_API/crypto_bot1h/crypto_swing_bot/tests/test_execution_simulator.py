@@ -0,0 +1,142 @@
+"""
+Vectorized exit simulation
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.execution_simulator as execution_simulator
+from core.execution_simulator import ExecutionSimulator
+
+MINUTE_MS = 60_000
+
+
+def make_bars(symbol, closes, start=0):
+    closes = np.asarray(closes, dtype=float)
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    timestamps = start + MINUTE_MS * np.arange(len(closes))
+    return pd.DataFrame({
+        'symbol': symbol, 'timestamp': timestamps, 'close_time': timestamps + MINUTE_MS - 1,
+        'open': opens, 'high': np.maximum(opens, closes) + 0.5, 'low': np.minimum(opens, closes) - 0.5
+    })
+
+
+def brute_force_first_touch(trades, bars):
+    """Reference: check every bar of every trade's symbol"""
+    expected = {}
+    for key, trade in trades.iterrows():
+        path = bars[(bars['symbol'] == trade['symbol']) & (bars['timestamp'] >= trade['entry_time'])]
+        path = path.sort_values('timestamp')
+        for _, bar in path.iterrows():
+            if trade['side'] == 'LONG':
+                stop, target = bar['low'] <= trade['stop_loss'], bar['high'] >= trade['take_profit']
+            else:
+                stop, target = bar['high'] >= trade['stop_loss'], bar['low'] <= trade['take_profit']
+            if stop or target:
+                expected[key] = ('STOP_LOSS' if stop else 'TAKE_PROFIT', bar['close_time'])
+                break
+    return expected
+
+
+@pytest.mark.parametrize('chunk', [1, 7, 256])
+def test_matches_brute_force(monkeypatch, chunk):
+    monkeypatch.setattr(execution_simulator, 'EXIT_SCAN_CHUNK', chunk)
+    rng = np.random.default_rng(7)
+    bars = pd.concat([
+        make_bars(symbol, 100 + np.cumsum(rng.normal(0, 1, 400)))
+        for symbol in ['BTCUSDT', 'ETHUSDT']
+    ]).sample(frac=1, random_state=1)  # Unsorted on purpose
+
+    n = 60
+    entry_bar = rng.integers(0, 420, n)  # Some start after the last bar
+    side = np.where(rng.random(n) < 0.5, 'LONG', 'SHORT')
+    entry = np.full(n, 100.0)
+    distance = rng.uniform(1, 15, n)
+    trades = pd.DataFrame({
+        'symbol': np.where(rng.random(n) < 0.5, 'BTCUSDT', 'ETHUSDT'),
+        'side': side,
+        'quantity': 1.0,
+        'stop_loss': np.where(side == 'LONG', entry - distance, entry + distance),
+        'take_profit': np.where(side == 'LONG', entry + 2 * distance, entry - 2 * distance),
+        'entry_time': entry_bar * MINUTE_MS + 1  # Mid-bar: first full bar after entry
+    }, index=[f"t{i}" for i in range(n)])
+
+    exits = ExecutionSimulator().simulate_exits(trades, bars)
+    expected = brute_force_first_touch(trades, bars)
+
+    assert list(exits.index) == [key for key in trades.index if key in expected]
+    assert {key: (row['exit_reason'], row['exit_time']) for key, row in exits.iterrows()} == expected
+
+
+def test_bar_touching_both_levels_is_a_stop():
+    bars = make_bars('BTCUSDT', [100, 100, 100])
+    bars.loc[1, ['high', 'low']] = [120, 80]
+    trades = pd.DataFrame([{'symbol': 'BTCUSDT', 'side': 'LONG', 'quantity': 1.0,
+                            'stop_loss': 90.0, 'take_profit': 110.0, 'entry_time': 0}])
+
+    exits = ExecutionSimulator(slippage_bps=0).simulate_exits(trades, bars)
+
+    assert exits.iloc[0]['exit_reason'] == 'STOP_LOSS'
+    assert exits.iloc[0]['exit_price'] == 90.0
+
+
+def test_stop_gapped_through_fills_at_open():
+    bars = make_bars('BTCUSDT', [100, 100, 80])
+    bars.loc[2, 'open'] = 85.0
+    trades = pd.DataFrame([{'symbol': 'BTCUSDT', 'side': 'LONG', 'quantity': 2.0,
+                            'stop_loss': 90.0, 'take_profit': 130.0, 'entry_time': 0}])
+
+    exits = ExecutionSimulator(slippage_bps=0, fee_rate=0.001).simulate_exits(trades, bars)
+
+    assert exits.iloc[0]['exit_price'] == 85.0
+    assert exits.iloc[0]['exit_fee'] == pytest.approx(85.0 * 2 * 0.001)
+
+
+def test_no_touch_or_unknown_symbol_returns_nothing():
+    bars = make_bars('BTCUSDT', [100, 101, 100])
+    trades = pd.DataFrame([
+        {'symbol': 'BTCUSDT', 'side': 'LONG', 'quantity': 1.0, 'stop_loss': 50.0, 'take_profit': 150.0, 'entry_time': 0},
+        {'symbol': 'ETHUSDT', 'side': 'LONG', 'quantity': 1.0, 'stop_loss': 50.0, 'take_profit': 150.0, 'entry_time': 0},
+    ])
+
+    exits = ExecutionSimulator().simulate_exits(trades, bars)
+
+    assert exits.empty
+    assert list(exits.columns) == execution_simulator.EXIT_COLUMNS
+
+
+def test_entries_fill_at_first_open_after_latency():
+    bars = pd.concat([make_bars('BTCUSDT', [100, 101, 102, 103]), make_bars('ETHUSDT', [50, 51])])
+    orders = pd.DataFrame([
+        # Latency pushes this one past the 60s open onto the next bar
+        {'order_id': 'a', 'symbol': 'BTCUSDT', 'side': 'LONG', 'quantity': 2.0, 'signal_time': MINUTE_MS - 200},
+        {'order_id': 'b', 'symbol': 'BTCUSDT', 'side': 'SHORT', 'quantity': 1.0, 'signal_time': MINUTE_MS - 300},
+        # No ETH bar opens after this one, so it never fills
+        {'order_id': 'c', 'symbol': 'ETHUSDT', 'side': 'LONG', 'quantity': 1.0, 'signal_time': MINUTE_MS + 1},
+    ])
+    simulator = ExecutionSimulator(latency_ms=250, slippage_bps=10, fee_rate=0.001)
+
+    fills = simulator.simulate_entries(orders, bars).set_index('order_id')
+
+    assert sorted(fills.index) == ['a', 'b']
+    assert fills.loc['a', 'entry_time'] == 2 * MINUTE_MS
+    assert fills.loc['a', 'entry_price'] == pytest.approx(101 * 1.001)  # Opens at the prior close
+    assert fills.loc['a', 'entry_fee'] == pytest.approx(101 * 1.001 * 2 * 0.001)
+    assert fills.loc['b', 'entry_time'] == MINUTE_MS
+    assert fills.loc['b', 'entry_price'] == pytest.approx(100 * 0.999)
+    assert {'symbol', 'side', 'quantity', 'signal_time'} <= set(fills.columns)
+    assert 'open' not in fills.columns
+
+
+def test_entries_feed_exits():
+    bars = make_bars('BTCUSDT', [100, 100, 100, 112, 100])
+    orders = pd.DataFrame([{'symbol': 'BTCUSDT', 'side': 'LONG', 'quantity': 1.0, 'signal_time': 0,
+                            'stop_loss': 95.0, 'take_profit': 110.0}])
+    simulator = ExecutionSimulator(latency_ms=250, slippage_bps=0)
+
+    trades = simulator.simulate_entries(orders, bars)
+    exits = simulator.simulate_exits(trades, bars)
+
+    assert trades['entry_time'].tolist() == [MINUTE_MS]
+    assert exits['exit_reason'].tolist() == ['TAKE_PROFIT']
+    assert exits['exit_time'].tolist() == [4 * MINUTE_MS - 1]
@@ -0,0 +1,136 @@
+"""
+KlineDownloader against a local HTTP stand-in for the Binance archive
+"""
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.kline_downloader import KlineDownloader, load_klines, month_bounds
+
+HOUR_MS = 3_600_000
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """Serve tmp_path/archive over HTTP; yields (base_url, publish)"""
+    root = tmp_path / 'archive'
+    root.mkdir()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def publish(symbol, interval, month, bars=3, checksum=None, time_scale=1):
+        """Write a monthly archive zip plus its .CHECKSUM"""
+        start_ms, _ = month_bounds(month)
+        rows = []
+        for i in range(bars):
+            open_time = (start_ms + i * HOUR_MS) * time_scale
+            close_time = (start_ms + (i + 1) * HOUR_MS - 1) * time_scale
+            price = 100 + i
+            rows.append(f"{open_time},{price},{price + 1},{price - 1},{price + 0.5},10,"
+                        f"{close_time},1000,42,5,500,0")
+
+        name = f"{symbol}-{interval}-{month}"
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr(f"{name}.csv", "\n".join(rows) + "\n")
+        data = buffer.getvalue()
+
+        directory = root / 'data' / 'spot' / 'monthly' / 'klines' / symbol / interval
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{name}.zip").write_bytes(data)
+        digest = checksum or hashlib.sha256(data).hexdigest()
+        (directory / f"{name}.zip.CHECKSUM").write_text(f"{digest}  {name}.zip\n")
+
+    yield f"http://127.0.0.1:{server.server_address[1]}", publish
+
+    server.shutdown()
+    server.server_close()
+
+
+def make_downloader(base_url, tmp_path):
+    return KlineDownloader(root=str(tmp_path / 'lake'), base_url=base_url, workers=2, timeout=5)
+
+
+def test_monthly_archive_written_then_skipped(archive, tmp_path):
+    base_url, publish = archive
+    publish('BTCUSDT', '1h', '2023-01')
+    downloader = make_downloader(base_url, tmp_path)
+
+    counts = downloader.download(['BTCUSDT'], ['1h'], '2023-01', '2023-01')
+    assert counts == {'written': 1, 'skipped': 0, 'missing': 0, 'failed': 0}
+    assert os.path.exists(downloader.partition_path('BTCUSDT', '1h', '2023-01'))
+
+    df = load_klines(downloader.root, 'BTCUSDT', '1h')
+    start_ms, _ = month_bounds('2023-01')
+    assert df['timestamp'].tolist() == [start_ms, start_ms + HOUR_MS, start_ms + 2 * HOUR_MS]
+    assert df['close'].tolist() == [100.5, 101.5, 102.5]
+
+    # Finished months are not fetched again
+    counts = downloader.download(['BTCUSDT'], ['1h'], '2023-01', '2023-01')
+    assert counts == {'written': 0, 'skipped': 1, 'missing': 0, 'failed': 0}
+
+
+def test_microsecond_archive_normalized_to_ms(archive, tmp_path):
+    base_url, publish = archive
+    publish('BTCUSDT', '1h', '2023-01', time_scale=1000)
+    downloader = make_downloader(base_url, tmp_path)
+
+    downloader.download(['BTCUSDT'], ['1h'], '2023-01', '2023-01')
+
+    start_ms, _ = month_bounds('2023-01')
+    df = load_klines(downloader.root, 'BTCUSDT', '1h')
+    assert df['timestamp'].iloc[0] == start_ms
+    assert df['close_time'].iloc[0] == start_ms + HOUR_MS - 1
+
+
+def test_checksum_mismatch_fails(archive, tmp_path):
+    base_url, publish = archive
+    publish('BTCUSDT', '1h', '2023-01', checksum='0' * 64)
+    downloader = make_downloader(base_url, tmp_path)
+
+    counts = downloader.download(['BTCUSDT'], ['1h'], '2023-01', '2023-01')
+
+    assert counts['failed'] == 1
+    assert not os.path.exists(downloader.partition_path('BTCUSDT', '1h', '2023-01'))
+
+
+def test_missing_archive_reported(archive, tmp_path):
+    base_url, publish = archive
+    publish('BTCUSDT', '1h', '2023-01')
+    downloader = make_downloader(base_url, tmp_path)
+
+    counts = downloader.download(['BTCUSDT', 'ETHUSDT'], ['1h'], '2023-01', '2023-01')
+
+    assert counts == {'written': 1, 'skipped': 0, 'missing': 1, 'failed': 0}
+
+
+def test_load_klines_prunes_partitions(archive, tmp_path):
+    base_url, publish = archive
+    for month in ['2023-01', '2023-02', '2023-03']:
+        publish('BTCUSDT', '1h', month)
+    publish('ETHUSDT', '1h', '2023-02')
+    downloader = make_downloader(base_url, tmp_path)
+    downloader.download(['BTCUSDT', 'ETHUSDT'], ['1h'], '2023-01', '2023-03')
+
+    # A pruned partition is never opened, so corrupting it must not matter
+    with open(downloader.partition_path('BTCUSDT', '1h', '2023-01'), 'wb') as f:
+        f.write(b'not parquet')
+
+    feb_start, feb_end = month_bounds('2023-02')
+    df = load_klines(downloader.root, 'BTCUSDT', '1h', start_time=feb_start + HOUR_MS, end_time=feb_end,
+                     columns=['timestamp', 'close'])
+
+    assert list(df.columns) == ['timestamp', 'close']
+    assert df['timestamp'].tolist() == [feb_start + HOUR_MS, feb_start + 2 * HOUR_MS]
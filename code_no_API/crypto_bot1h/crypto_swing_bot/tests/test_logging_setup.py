@@ -0,0 +1,113 @@
+"""
+Queued logging, gzip rotation and JSON lines
+"""
+import gzip
+import json
+import logging
+import os
+import time
+
+import pytest
+
+from core.logging_setup import JsonFormatter, SizeAndTimeRotatingFileHandler, event_fields, setup_logging
+
+
+@pytest.fixture
+def root_logger():
+    """Restore the root logger after setup_logging replaces its handlers"""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.handlers = [handler]
+    return logger
+
+
+def test_rotates_on_size_into_gzipped_backups(tmp_path):
+    path = str(tmp_path / 'bot.log')
+    handler = SizeAndTimeRotatingFileHandler(path, max_bytes=300, backup_count=2)
+    handler.setFormatter(JsonFormatter())
+    logger = make_logger('test.rotation.size', handler)
+
+    for i in range(40):
+        logger.info("line %d", i)
+    handler.close()
+
+    assert sorted(os.listdir(tmp_path)) == ['bot.log', 'bot.log.1.gz', 'bot.log.2.gz']
+    assert os.path.getsize(path) <= 300
+    with gzip.open(f"{path}.1.gz", 'rt') as f:
+        backup = [json.loads(line) for line in f]
+    with open(path) as f:
+        current = [json.loads(line) for line in f]
+    # Newest backup holds the lines just before the current file
+    assert int(backup[-1]['message'].split()[1]) + 1 == int(current[0]['message'].split()[1])
+    assert current[-1]['message'] == 'line 39'
+
+
+def test_rotates_on_time(tmp_path):
+    path = str(tmp_path / 'bot.log')
+    handler = SizeAndTimeRotatingFileHandler(path, backup_count=3, rotate_seconds=0.05)
+    logger = make_logger('test.rotation.time', handler)
+
+    logger.info("before")
+    time.sleep(0.1)
+    logger.info("after")
+    handler.close()
+
+    with gzip.open(f"{path}.1.gz", 'rt') as f:
+        assert f.read().strip() == 'before'
+    with open(path) as f:
+        assert f.read().strip() == 'after'
+
+
+def test_json_lines_carry_event_fields(tmp_path):
+    path = str(tmp_path / 'bot.log')
+    handler = SizeAndTimeRotatingFileHandler(path)
+    handler.setFormatter(JsonFormatter())
+    logger = make_logger('test.json', handler)
+
+    logger.info("Signal found: %s", 'BTCUSDT',
+                extra=event_fields(12, 'scan', 'BTCUSDT', started=time.perf_counter()))
+    logger.info("Cycle complete", extra=event_fields(12, 'cycle'))
+    try:
+        raise ValueError("bad bar")
+    except ValueError:
+        logger.exception("Error analyzing %s", 'ETHUSDT', extra=event_fields(12, 'scan', 'ETHUSDT'))
+    handler.close()
+
+    with open(path) as f:
+        signal, cycle, error = [json.loads(line) for line in f]
+
+    assert signal['message'] == 'Signal found: BTCUSDT'
+    assert (signal['cycle_id'], signal['stage'], signal['symbol']) == (12, 'scan', 'BTCUSDT')
+    assert signal['latency_ms'] >= 0 and signal['level'] == 'INFO' and signal['logger'] == 'test.json'
+    # Unset fields are left out rather than written as null
+    assert 'symbol' not in cycle and 'latency_ms' not in cycle and 'exception' not in cycle
+    assert error['level'] == 'ERROR'
+    assert 'ValueError: bad bar' in error['exception']
+
+
+def test_setup_logging_routes_through_queue(tmp_path, root_logger):
+    path = str(tmp_path / 'bot.log')
+    listener = setup_logging(path, level='INFO', module_levels={'test.noisy': 'WARNING'})
+
+    logging.getLogger('test.bot').info("Trading cycle #%d", 3, extra=event_fields(3, 'cycle'))
+    logging.getLogger('test.noisy').info("dropped by its module level")
+    logging.getLogger('test.bot').debug("below the root level")
+    listener.stop()  # Flushes the queue
+    for handler in listener.handlers:
+        handler.close()
+
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert [(line['message'], line['cycle_id']) for line in lines] == [("Trading cycle #3", 3)]
@@ -0,0 +1,236 @@
+"""
+OrderManager against the in-memory OCO exchange
+"""
+import time
+
+import pytest
+
+from core.order_manager import OrderManager, UnprotectedPosition
+from mock_exchange import MockOCOExchange
+
+
+@pytest.fixture
+def exchange():
+    return MockOCOExchange({'BTCUSDT': 100.0, 'ETHUSDT': 50.0, 'SOLUSDT': 20.0})
+
+
+def start_manager(exchange, alerts=None):
+    exits = []
+    manager = OrderManager(exchange, lambda *args: exits.append(args),
+                           on_alert=None if alerts is None else alerts.append, settle_seconds=0.05)
+    manager.start()
+    return manager, exits
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_entry_places_bracket_priced_off_fill(exchange):
+    manager, exits = start_manager(exchange)
+
+    placed = manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'LONG', 0.01, stop_loss=95.0, risk_reward=2.0)
+
+    assert placed['entry_price'] == 100.0
+    assert placed['quantity'] == pytest.approx(0.00999)  # Less the base-asset fee
+    assert placed['take_profit'] == 110.0
+    assert placed['fee'] == pytest.approx(0.001)
+    assert [o['list_client_id'] for o in exchange.get_open_oco_orders()] == ['BTCUSDT_1']
+
+    manager.track(placed['list_id'], 'BTCUSDT', 'BTCUSDT_1', placed['quantity'])
+    exchange.set_price('BTCUSDT', 111.0)
+
+    assert exits == [('BTCUSDT', 'TAKE_PROFIT', 110.0, pytest.approx(0.00999 * 110.0 * 0.001))]
+    assert exchange.get_open_oco_orders() == []
+    statuses = {o['client_order_id']: o['status'] for o in exchange.orders}
+    assert statuses == {'BTCUSDT_1_in': 'FILLED', 'BTCUSDT_1_tp': 'FILLED', 'BTCUSDT_1_sl': 'EXPIRED'}
+
+
+def test_stop_fills_at_stop_limit_price(exchange):
+    manager, exits = start_manager(exchange)
+    placed = manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'LONG', 0.01, stop_loss=95.0, risk_reward=2.0)
+    manager.track(placed['list_id'], 'BTCUSDT', 'BTCUSDT_1', placed['quantity'])
+
+    exchange.set_price('BTCUSDT', 94.9)
+
+    assert [(symbol, reason, price) for symbol, reason, price, _ in exits] == [('BTCUSDT', 'STOP_LOSS', 94.81)]
+    # The take-profit's expiry is not mistaken for a lost bracket
+    time.sleep(0.1)
+    assert len(exits) == 1
+    assert [o['client_order_id'] for o in exchange.orders if o['side'] == 'SELL' and o['list_id'] == -1] == []
+
+
+def test_fill_before_track_is_held(exchange):
+    manager, exits = start_manager(exchange)
+    placed = manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'LONG', 0.01, stop_loss=95.0, risk_reward=2.0)
+
+    # Bracket fills before the bot has recorded the trade
+    exchange.set_price('BTCUSDT', 120.0)
+    assert exits == []
+
+    manager.track(placed['list_id'], 'BTCUSDT', 'BTCUSDT_1', placed['quantity'])
+    assert [reason for _, reason, _, _ in exits] == ['TAKE_PROFIT']
+
+
+def test_rejected_bracket_is_flattened(exchange):
+    manager, exits = start_manager(exchange)
+
+    # Stop above the fill puts the take-profit below market, so the OCO is rejected
+    placed = manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'LONG', 0.01, stop_loss=101.0, risk_reward=2.0)
+
+    assert placed is None
+    assert exchange.get_open_oco_orders() == []
+    entry, flatten = exchange.orders
+    assert (entry['side'], entry['client_order_id']) == ('BUY', 'BTCUSDT_1_in')
+    assert (flatten['side'], flatten['client_order_id'], flatten['status']) == ('SELL', 'BTCUSDT_1_out', 'FILLED')
+    assert flatten['quantity'] == pytest.approx(0.00999)
+    assert exits == []
+
+
+def test_short_is_skipped(exchange):
+    manager, _ = start_manager(exchange)
+    assert manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'SHORT', 0.01, stop_loss=105.0, risk_reward=2.0) is None
+    assert exchange.orders == []
+
+
+def test_reconcile_after_restart(exchange):
+    entry_time_ms = int(time.time() * 1000) - 1000
+    manager, _ = start_manager(exchange)
+    working = manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'LONG', 0.01, stop_loss=95.0, risk_reward=2.0)
+    manager.open_bracket('ETHUSDT_1', 'ETHUSDT', 'LONG', 0.1, stop_loss=45.0, risk_reward=2.0)
+
+    # Bot goes down, ETH hits its target meanwhile
+    manager.stop()
+    exchange.set_price('ETHUSDT', 61.0)
+
+    restarted, exits = start_manager(exchange)
+    states = restarted.reconcile({
+        'BTCUSDT_1': ('BTCUSDT', entry_time_ms),
+        'ETHUSDT_1': ('ETHUSDT', entry_time_ms),
+        'SOLUSDT_1': ('SOLUSDT', entry_time_ms),  # No bracket was ever placed
+    })
+
+    assert states == {
+        'BTCUSDT_1': {'state': 'OPEN', 'list_id': working['list_id']},
+        'ETHUSDT_1': {'state': 'CLOSED', 'reason': 'TAKE_PROFIT', 'price': 60.0},
+        'SOLUSDT_1': {'state': 'MISSING'},
+    }
+
+    # Resumed bracket keeps delivering exits
+    restarted.track(working['list_id'], 'BTCUSDT', 'BTCUSDT_1', working['quantity'])
+    exchange.set_price('BTCUSDT', 94.9)
+    assert [(symbol, reason) for symbol, reason, _, _ in exits] == [('BTCUSDT', 'STOP_LOSS')]
+
+
+def test_reconcile_isolates_failed_lookups(exchange, monkeypatch):
+    manager, _ = start_manager(exchange)
+    manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'LONG', 0.01, stop_loss=95.0, risk_reward=2.0)
+    manager.stop()
+    exchange.set_price('BTCUSDT', 120.0)
+
+    history = exchange.get_order_history
+
+    def flaky_history(symbol, start_time=None):
+        if symbol == 'ETHUSDT':
+            raise ConnectionError("timeout")
+        return history(symbol, start_time)
+
+    monkeypatch.setattr(exchange, 'get_order_history', flaky_history)
+    states = OrderManager(exchange, lambda *args: None).reconcile({
+        'ETHUSDT_1': ('ETHUSDT', 0),
+        'BTCUSDT_1': ('BTCUSDT', 0),
+    })
+
+    assert states['ETHUSDT_1'] == {'state': 'ERROR', 'error': 'timeout'}
+    assert states['BTCUSDT_1']['state'] == 'CLOSED'
+
+
+def test_flatten_failure_raises_unprotected(exchange, monkeypatch):
+    manager, _ = start_manager(exchange)
+    place = exchange.place_market_order
+
+    def sells_fail(symbol, side, quantity, client_order_id=None):
+        if side == 'SELL':
+            raise ConnectionError("timeout")
+        return place(symbol, side, quantity, client_order_id)
+
+    monkeypatch.setattr(exchange, 'place_market_order', sells_fail)
+
+    with pytest.raises(UnprotectedPosition) as raised:
+        manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'LONG', 0.01, stop_loss=101.0, risk_reward=2.0)
+
+    assert (raised.value.symbol, raised.value.entry_price) == ('BTCUSDT', 100.0)
+    assert raised.value.quantity == pytest.approx(0.00999)
+
+
+def test_entry_error_checks_whether_it_filled(exchange, monkeypatch):
+    manager, _ = start_manager(exchange)
+    place = exchange.place_market_order
+
+    def fills_then_times_out(symbol, side, quantity, client_order_id=None):
+        place(symbol, side, quantity, client_order_id)
+        raise ConnectionError("read timeout")
+
+    monkeypatch.setattr(exchange, 'place_market_order', fills_then_times_out)
+    with pytest.raises(UnprotectedPosition) as raised:
+        manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'LONG', 0.01, stop_loss=95.0, risk_reward=2.0)
+    assert (raised.value.quantity, raised.value.entry_price) == (0.01, 100.0)
+
+    # A rejection that left nothing open is re-raised as is
+    def rejects(symbol, side, quantity, client_order_id=None):
+        raise ValueError("Account has insufficient balance")
+
+    monkeypatch.setattr(exchange, 'place_market_order', rejects)
+    with pytest.raises(ValueError):
+        manager.open_bracket('ETHUSDT_1', 'ETHUSDT', 'LONG', 0.1, stop_loss=45.0, risk_reward=2.0)
+
+
+def test_unfilled_stop_limit_is_flattened(exchange):
+    alerts = []
+    manager, exits = start_manager(exchange, alerts)
+    placed = manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'LONG', 0.01, stop_loss=95.0, risk_reward=2.0)
+    manager.track(placed['list_id'], 'BTCUSDT', 'BTCUSDT_1', placed['quantity'])
+
+    # Gaps through the stop-limit price: the leg triggers but rests unfilled
+    exchange.set_price('BTCUSDT', 90.0)
+    assert exits == []
+
+    assert wait_for(lambda: exits)
+    assert exits == [('BTCUSDT', 'BRACKET_LOST', 90.0, pytest.approx(0.00999 * 90.0 * 0.001))]
+    statuses = {o['client_order_id']: o['status'] for o in exchange.orders}
+    assert statuses['BTCUSDT_1_sl'] == 'CANCELED'
+    assert statuses['BTCUSDT_1_out'] == 'FILLED'
+    assert len(alerts) == 1 and 'flattened' in alerts[0]
+
+
+def test_cancelled_bracket_is_flattened(exchange):
+    alerts = []
+    manager, exits = start_manager(exchange, alerts)
+    placed = manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'LONG', 0.01, stop_loss=95.0, risk_reward=2.0)
+    manager.track(placed['list_id'], 'BTCUSDT', 'BTCUSDT_1', placed['quantity'])
+
+    exchange.cancel_order('BTCUSDT', 'BTCUSDT_1_tp')  # By hand, from the exchange UI
+
+    assert wait_for(lambda: exits)
+    assert [(reason, price) for _, reason, price, _ in exits] == [('BRACKET_LOST', 100.0)]
+    assert alerts
+
+
+def test_failed_flatten_of_lost_bracket_alerts(exchange, monkeypatch):
+    alerts = []
+    manager, exits = start_manager(exchange, alerts)
+    placed = manager.open_bracket('BTCUSDT_1', 'BTCUSDT', 'LONG', 0.01, stop_loss=95.0, risk_reward=2.0)
+    manager.track(placed['list_id'], 'BTCUSDT', 'BTCUSDT_1', placed['quantity'])
+
+    def down(*args, **kwargs):
+        raise ConnectionError("timeout")
+
+    monkeypatch.setattr(exchange, 'place_market_order', down)
+    exchange.set_price('BTCUSDT', 90.0)
+
+    assert wait_for(lambda: alerts)
+    assert 'manually' in alerts[0]
+    assert exits == []
@@ -0,0 +1,120 @@
+"""
+Flight recorder, cycle profiler and the control endpoint
+"""
+import json
+import os
+import tracemalloc
+import urllib.error
+import urllib.request
+
+import pytest
+
+from core.profiler import ControlServer, CycleProfiler, FlightRecorder
+
+
+def test_flight_recorder_keeps_last_cycles(tmp_path):
+    recorder = FlightRecorder(capacity=3, dump_dir=str(tmp_path))
+    for cycle_id in range(1, 6):
+        recorder.start_cycle(cycle_id)
+        with recorder.stage('fetch'):
+            pass
+        recorder.add('fetch', 0.5)
+        recorder.end_cycle()
+
+    records = recorder.snapshot()
+    assert [r['cycle_id'] for r in records] == [3, 4, 5]
+    assert all(r['stages']['fetch'] >= 0.5 and r['total'] is not None for r in records)
+
+
+def test_flight_recorder_records_errors_and_dumps(tmp_path):
+    recorder = FlightRecorder(capacity=10, dump_dir=str(tmp_path))
+    recorder.add('notify', 1.0)  # Outside a cycle: dropped
+    assert recorder.end_cycle() is None
+
+    recorder.start_cycle(7)
+    record = recorder.end_cycle("ConnectionError: timeout")
+    assert record['error'] == "ConnectionError: timeout"
+    assert record['stages']['notify'] == 0.0
+
+    with open(recorder.dump('crash')) as f:
+        dumped = json.load(f)
+    assert dumped['reason'] == 'crash'
+    assert [c['cycle_id'] for c in dumped['cycles']] == [7]
+
+
+def test_armed_profiler_captures_exactly_n_cycles(tmp_path):
+    profiler = CycleProfiler(str(tmp_path))
+    assert profiler.arm(2) == 2
+
+    for cycle_id in range(1, 5):
+        profiler.start_cycle(cycle_id)
+        sum(range(1000))
+        profiler.end_cycle(cycle_id)
+
+    files = sorted(os.listdir(tmp_path))
+    for suffix in ('.prof', '.tracemalloc', '_alloc.txt'):
+        assert [name.split('_')[1] for name in files if name.endswith(suffix)] == ['1', '2']
+    assert not tracemalloc.is_tracing()
+
+
+def test_arm_keeps_larger_pending_count():
+    profiler = CycleProfiler()
+    profiler.arm(3)
+    assert profiler.arm(1) == 3
+
+    with pytest.raises(ValueError):
+        profiler.arm(0)
+    assert profiler.armed_cycles == 3
+
+
+@pytest.fixture
+def control(tmp_path):
+    profiler = CycleProfiler(str(tmp_path))
+    recorder = FlightRecorder(dump_dir=str(tmp_path))
+    server = ControlServer(0, profiler, recorder, default_cycles=2)
+    server.start()
+    yield f"http://127.0.0.1:{server.server.server_address[1]}", profiler, recorder
+    server.stop()
+
+
+def request(url, method='POST'):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method=method), timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_profile_endpoint_arms_profiler(control):
+    base_url, profiler, _ = control
+
+    assert request(f"{base_url}/profile") == (200, {'armed_cycles': 2})
+    assert request(f"{base_url}/profile?cycles=5") == (200, {'armed_cycles': 5})
+    # A smaller request doesn't shrink what's pending, and the reply says so
+    assert request(f"{base_url}/profile?cycles=1") == (200, {'armed_cycles': 5})
+    assert profiler.armed_cycles == 5
+
+
+@pytest.mark.parametrize('cycles', ['abc', '0', '-2'])
+def test_profile_endpoint_rejects_bad_cycles(control, cycles):
+    base_url, profiler, _ = control
+
+    status, body = request(f"{base_url}/profile?cycles={cycles}")
+
+    assert status == 400
+    assert 'cycles' in body['error']
+    assert profiler.armed_cycles == 0
+
+
+def test_flight_endpoints(control):
+    base_url, _, recorder = control
+    recorder.start_cycle(1)
+    recorder.end_cycle()
+
+    status, cycles = request(f"{base_url}/flight", method='GET')
+    assert status == 200 and [c['cycle_id'] for c in cycles] == [1]
+
+    status, body = request(f"{base_url}/flight/dump")
+    assert status == 200 and os.path.exists(body['path'])
+
+    assert request(f"{base_url}/nowhere", method='GET')[0] == 404
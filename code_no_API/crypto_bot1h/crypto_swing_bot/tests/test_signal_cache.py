@@ -0,0 +1,75 @@
+"""
+SignalCache eviction, persistence and sharing between processes
+"""
+import json
+
+from core.signal_cache import SignalCache
+
+
+def key(symbol, close_time=1):
+    return SignalCache.make_key(symbol, '4h', close_time, 'abc123')
+
+
+def test_least_recently_used_entry_evicted():
+    cache = SignalCache(None, max_entries=2)
+    cache.put(key('BTCUSDT'), {'signal': 'HOLD'})
+    cache.put(key('ETHUSDT'), {'signal': 'HOLD'})
+    cache.get(key('BTCUSDT'))
+
+    cache.put(key('SOLUSDT'), {'signal': 'BUY'})
+
+    assert cache.get(key('ETHUSDT')) is None
+    assert cache.get(key('BTCUSDT')) == {'signal': 'HOLD'}
+    assert list(cache.entries) == [key('SOLUSDT'), key('BTCUSDT')]
+
+
+def test_reloaded_after_restart(tmp_path):
+    path = str(tmp_path / 'cache' / 'signal_cache.json')
+    cache = SignalCache(path, max_entries=10)
+    cache.put(key('BTCUSDT'), {'signal': 'BUY', 'stop_loss': 95.0})
+    cache.put(key('ETHUSDT'), {'signal': 'HOLD'})
+
+    restarted = SignalCache(path, max_entries=10)
+
+    assert restarted.get(key('BTCUSDT')) == {'signal': 'BUY', 'stop_loss': 95.0}
+    assert restarted.get(key('SOLUSDT')) is None
+
+
+def test_reload_keeps_most_recent_within_limit(tmp_path):
+    path = str(tmp_path / 'signal_cache.json')
+    cache = SignalCache(path, max_entries=10)
+    for close_time in range(5):
+        cache.put(key('BTCUSDT', close_time), {'signal': 'HOLD'}, save=False)
+    cache.save()
+
+    restarted = SignalCache(path, max_entries=3)
+
+    assert list(restarted.entries) == [key('BTCUSDT', t) for t in (2, 3, 4)]
+
+
+def test_refresh_merges_entries_from_another_process(tmp_path):
+    path = str(tmp_path / 'signal_cache.json')
+    first, second = SignalCache(path), SignalCache(path)
+
+    first.put(key('BTCUSDT'), {'signal': 'BUY'})
+    # A miss re-reads the file, so the other bot doesn't act on the same bar again
+    assert second.get(key('BTCUSDT')) == {'signal': 'BUY'}
+
+    second.put(key('ETHUSDT'), {'signal': 'HOLD'})
+    first.put(key('SOLUSDT'), {'signal': 'HOLD'})
+
+    with open(path) as f:
+        stored = dict(json.load(f))
+    assert set(stored) == {key('BTCUSDT'), key('ETHUSDT'), key('SOLUSDT')}
+    assert first.get(key('ETHUSDT')) == {'signal': 'HOLD'}
+
+
+def test_unreadable_file_starts_fresh(tmp_path):
+    path = tmp_path / 'signal_cache.json'
+    path.write_text('{not json')
+
+    cache = SignalCache(str(path))
+    assert cache.entries == {}
+
+    cache.put(key('BTCUSDT'), {'signal': 'HOLD'})
+    assert SignalCache(str(path)).get(key('BTCUSDT')) == {'signal': 'HOLD'}
@@ -0,0 +1,166 @@
+"""
+SQLite trade store and the Excel report built from it
+"""
+import os
+import time
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+import core.excel_report as excel_report
+from core.excel_report import TRADE_COLUMNS, ExcelReportWriter
+from core.trade_logger import TradeLogger
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'trade_history.xlsx'), str(tmp_path / 'trade_history.db')
+
+
+@pytest.fixture
+def trade_logger(paths, monkeypatch):
+    # Report builds are covered below; keep them out of the store tests
+    monkeypatch.setattr(ExcelReportWriter, 'build', lambda self: True)
+    excel_path, db_path = paths
+    trade_logger = TradeLogger(excel_path, db_path)
+    yield trade_logger
+    trade_logger.close()
+
+
+def entry(symbol, side='LONG', entry_price=100.0, quantity=2.0, **extra):
+    return {'symbol': symbol, 'side': side, 'entry_price': entry_price, 'quantity': quantity,
+            'stop_loss': 95.0, 'take_profit': 110.0, **extra}
+
+
+def test_exit_pnl_is_net_of_fees(trade_logger):
+    long_id = trade_logger.log_trade_entry(entry('BTCUSDT', trade_id='long_1'))
+    short_id = trade_logger.log_trade_entry(entry('ETHUSDT', side='SHORT', trade_id='short_1'))
+
+    assert trade_logger.log_trade_exit(long_id, {'exit_price': 110.0, 'fees': 0.5, 'notes': 'Exit: TAKE_PROFIT'})
+    assert trade_logger.log_trade_exit(short_id, {'exit_price': 110.0, 'fees': 0.5})
+    assert not trade_logger.log_trade_exit('unknown', {'exit_price': 1.0})
+
+    conn = trade_logger.connect()
+    rows = {row[0]: row[1:] for row in conn.execute(
+        "SELECT Trade_ID, Status, Exit_Price, PnL_USD, PnL_Percent, Notes FROM trades")}
+    conn.close()
+    assert rows['long_1'] == ('CLOSED', 110.0, 19.5, 9.75, 'Exit: TAKE_PROFIT')
+    assert rows['short_1'] == ('CLOSED', 110.0, -20.5, -10.25, '')
+
+
+def test_open_trades_excludes_closed(trade_logger):
+    trade_logger.log_trade_entry(entry('BTCUSDT', trade_id='a', notes='Live Trade #1'))
+    trade_logger.log_trade_entry(entry('ETHUSDT', trade_id='b'))
+    trade_logger.log_trade_exit('b', {'exit_price': 101.0})
+
+    open_trades = trade_logger.get_open_trades()
+
+    assert open_trades['Trade_ID'].tolist() == ['a']
+    assert open_trades.iloc[0]['Notes'] == 'Live Trade #1'
+    assert open_trades.iloc[0]['Stop_Loss'] == 95.0
+
+
+def test_existing_excel_log_imported_once(paths, monkeypatch):
+    monkeypatch.setattr(ExcelReportWriter, 'build', lambda self: True)
+    excel_path, db_path = paths
+    pd.DataFrame([
+        {'Trade_ID': 'old_1', 'Symbol': 'BTCUSDT', 'Side': 'LONG', 'Status': 'CLOSED',
+         'Entry_Price': 100.0, 'Entry_Time': pd.Timestamp('2024-01-02 03:04:05'), 'PnL_USD': 5.0},
+        {'Trade_ID': 'old_2', 'Symbol': 'ETHUSDT', 'Side': 'LONG', 'Status': 'OPEN',
+         'Entry_Price': 50.0, 'Entry_Time': pd.Timestamp('2024-01-03'), 'PnL_USD': 0.0},
+    ]).to_excel(excel_path, index=False)
+
+    for _ in range(2):
+        trade_logger = TradeLogger(excel_path, db_path)
+        trade_logger.close()
+
+    conn = trade_logger.connect()
+    rows = conn.execute("SELECT Trade_ID, Entry_Time FROM trades ORDER BY rowid").fetchall()
+    conn.close()
+    assert rows == [('old_1', '2024-01-02 03:04:05'), ('old_2', '2024-01-03 00:00:00')]
+    assert trade_logger.get_open_trades()['Trade_ID'].tolist() == ['old_2']
+
+
+def test_report_lists_trades_per_symbol(trade_logger):
+    for i, symbol in enumerate(['BTCUSDT', 'ETHUSDT', 'BTCUSDT']):
+        trade_logger.log_trade_entry(entry(symbol, trade_id=f"t{i}"))
+    trade_logger.log_trade_exit('t0', {'exit_price': 90.0})
+
+    writer = trade_logger.report_writer
+    assert writer.materialize()
+
+    wb = load_workbook(writer.excel_path, read_only=True)
+    assert wb.sheetnames == ['Summary', 'Trades', 'BTCUSDT', 'ETHUSDT']
+    trades = list(wb['Trades'].values)
+    assert trades[0] == tuple(TRADE_COLUMNS)
+    assert [row[0] for row in trades[1:]] == ['t0', 't1', 't2']
+    assert [row[0] for row in list(wb['BTCUSDT'].values)[1:]] == ['t0', 't2']
+    summary = dict(row for row in wb['Summary'].values if row and len(row) == 2)
+    assert (summary['Total Trades'], summary['Open'], summary['Total PnL USD']) == (3, 2, -20)
+    wb.close()
+    assert not os.path.exists(f"{writer.excel_path}.tmp")
+
+
+def test_locked_report_keeps_old_file(trade_logger, monkeypatch):
+    trade_logger.log_trade_entry(entry('BTCUSDT'))
+    writer = trade_logger.report_writer
+    with open(writer.excel_path, 'w') as f:
+        f.write('previous report')
+
+    def locked(src, dst):
+        raise PermissionError("file is open in Excel")
+
+    monkeypatch.setattr(excel_report.os, 'replace', locked)
+
+    assert not writer.materialize()
+    with open(writer.excel_path) as f:
+        assert f.read() == 'previous report'
+    assert not os.path.exists(f"{writer.excel_path}.tmp")
+
+
+def test_failed_build_is_retried(paths, monkeypatch):
+    excel_path, db_path = paths
+    results = iter([False, True, True])
+    builds = []
+
+    def build(self):
+        builds.append(True)
+        return next(results)
+
+    monkeypatch.setattr(ExcelReportWriter, 'build', build)
+    writer = ExcelReportWriter(db_path, excel_path, min_interval=0)
+    writer.start()
+    writer.request()
+
+    deadline = time.time() + 2
+    while len(builds) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    writer.stop()
+
+    assert len(builds) == 3  # Failed, retried, then the final report on stop
+
+
+def test_stale_tmp_removed_on_start(paths):
+    excel_path, db_path = paths
+    with open(f"{excel_path}.tmp", 'w') as f:
+        f.write('half a workbook')
+
+    writer = ExcelReportWriter(db_path, excel_path)
+    writer.start()
+    writer.stop()
+
+    assert not os.path.exists(f"{excel_path}.tmp")
+
+
+def test_final_report_built_in_subprocess(paths):
+    excel_path, db_path = paths
+    trade_logger = TradeLogger(excel_path, db_path, report_interval=3600)
+    trade_logger.log_trade_entry(entry('BTCUSDT', trade_id='t0'))
+
+    # The final build must finish before close() returns, even mid-interval
+    trade_logger.close()
+
+    wb = load_workbook(excel_path, read_only=True)
+    assert [row[0] for row in list(wb['Trades'].values)[1:]] == ['t0']
+    wb.close()